@@ -0,0 +1,238 @@
+"""Benchmark the phases of biomake and write the timings as JSON.
+
+The phases are the construction of the `yeadon.Human` (which reads the measurement file), the construction of the
+segments of each model variant, `parse_biomod_options` and the serialization of each variant with `str`. They are run
+on `example/female1.txt` with `example/female1_opt.yml` and on synthetic cohorts of perturbed copies of female1.
+The startup of new processes is timed too: `import biomake`, `biomake.py --help` and a run served by the cache.
+
+    python benchmarks/bench_biomake.py -o results.json
+    python benchmarks/bench_biomake.py --sizes 1 100 -o new.json --compare results.json
+"""
+
+import argparse
+import contextlib
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+
+import numpy as np
+import yaml
+import yeadon
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import biomake  # noqa: E402
+
+SCRIPT = os.path.join(ROOT, "biomake.py")
+MEAS = os.path.join(ROOT, "example", "female1.txt")
+OPTIONS = os.path.join(ROOT, "example", "female1_opt.yml")
+
+
+def synthetic_cohort(n: int, directory: str, seed: int = 0) -> list[str]:
+    """Write `n` measurement files to `directory`: female1 scaled by 0.85-1.15 with 3 % noise on each measurement."""
+    with open(MEAS) as f:
+        meas = yaml.safe_load(f.read())
+    rng = np.random.default_rng(seed)
+    files = []
+    for i in range(n):
+        scale = rng.uniform(0.85, 1.15)
+        subject = {
+            key: (
+                val
+                if key == "measurementconversionfactor"
+                else val * scale**3 if key == "totalmass" else val * scale * rng.uniform(0.97, 1.03)
+            )
+            for key, val in meas.items()
+        }
+        files.append(os.path.join(directory, f"subject{i:05d}.txt"))
+        with open(files[-1], "w") as f:
+            yaml.safe_dump({key: float(val) for key, val in subject.items()}, f)
+
+    return files
+
+
+def variants() -> dict[str, tuple]:
+    """Get the model variants to build: each human model with default options, BioModHuman with the native backend
+    and with 6 decimals, and the model of the option file."""
+    return {
+        "BioModHuman": (biomake.BioModHuman, {}, {}),
+        "BioModHumanFusedLegs": (biomake.BioModHumanFusedLegs, {}, {}),
+        "BioModHuman_native": (biomake.BioModHuman, {"backend": "native"}, {}),
+        "BioModHuman_precision6": (biomake.BioModHuman, {"precision": 6}, {}),
+        "female1_opt": biomake.parse_biomod_options(OPTIONS),
+    }
+
+
+def stats(times: list[float]) -> dict[str, float]:
+    times = np.array(times)
+    return {
+        "n": len(times),
+        "total": times.sum(),
+        "mean": times.mean(),
+        "std": times.std(),
+        "min": times.min(),
+        "median": np.median(times),
+        "max": times.max(),
+    }
+
+
+def run(meas_files: list[str], repeat: int = 1) -> dict:
+    """Time every phase on each of `meas_files` `repeat` times, and `parse_biomod_options` `repeat` times."""
+    models = variants()
+    times = {"parse_options": [], "human": []}
+    for name in models:
+        times[f"build/{name}"] = []
+        times[f"serialize/{name}"] = []
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        tic = time.perf_counter()
+        biomake.parse_biomod_options(OPTIONS)
+        times["parse_options"].append(time.perf_counter() - tic)
+
+        for meas in meas_files:
+            tic = time.perf_counter()
+            human = biomake._yeadon_human(meas)
+            times["human"].append(time.perf_counter() - tic)
+
+            for name, (BioHuman, human_options, segments_options) in models.items():
+                tic = time.perf_counter()
+                biohuman = BioHuman(human, **human_options, **segments_options)
+                times[f"build/{name}"].append(time.perf_counter() - tic)
+
+                tic = time.perf_counter()
+                str(biohuman)
+                times[f"serialize/{name}"].append(time.perf_counter() - tic)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "subjects": len(meas_files),
+        "repeat": repeat,
+        "elapsed": elapsed,
+        "subjects_per_second": len(meas_files) * repeat / elapsed,
+        "phases": {phase: stats(t) for phase, t in times.items()},
+    }
+
+
+def startup(repeat: int = 1) -> dict:
+    """Time `repeat` new processes importing biomake, printing `--help` and getting a bioMod from the cache.
+
+    The import is the cumulative time of `biomake` reported by `python -X importtime`, the others are wall times.
+    """
+    # measured with the bytecode cached, like installed scripts are
+    env = {key: val for key, val in os.environ.items() if key != "PYTHONDONTWRITEBYTECODE"}
+    times = {"import": [], "help": [], "cache_hit": []}
+    with tempfile.TemporaryDirectory() as directory:
+        commands = {
+            "help": [sys.executable, SCRIPT, "--help"],
+            "cache_hit": [sys.executable, SCRIPT, MEAS, "--bioModOptions", OPTIONS, "--cache", directory],
+        }
+        for command in commands.values():  # warm up the bytecode and the cache
+            subprocess.run(command, env=env, capture_output=True, check=True)
+
+        for _ in range(repeat):
+            report = subprocess.run(
+                [sys.executable, "-X", "importtime", "-c", "import biomake"],
+                cwd=ROOT,
+                env=env,
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stderr
+            line = next(line for line in report.splitlines() if line.endswith("| biomake"))
+            times["import"].append(int(line.split("|")[1]) * 1e-6)
+
+            for name, command in commands.items():
+                tic = time.perf_counter()
+                subprocess.run(command, env=env, capture_output=True, check=True)
+                times[name].append(time.perf_counter() - tic)
+
+    return {"repeat": repeat, "phases": {phase: stats(t) for phase, t in times.items()}}
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """Print the ratios of the median times of `results` to those of `baseline`, return the phases slower than
+    `threshold` times the baseline."""
+    regressions = []
+    for dataset, result in results["datasets"].items():
+        old = baseline["datasets"].get(dataset)
+        if old is None:
+            continue
+        for phase, new_stats in result["phases"].items():
+            if phase not in old["phases"]:
+                continue
+            ratio = new_stats["median"] / old["phases"][phase]["median"]
+            flag = ""
+            if ratio > threshold:
+                regressions.append(f"{dataset}:{phase}")
+                flag = "  REGRESSION"
+            print(f"{dataset:>16} {phase:<32} {ratio:6.2f}x{flag}", file=sys.stderr)
+
+    return regressions
+
+
+def benchmark(sizes: list[int], repeat: int, seed: int = 0) -> dict:
+    """Run on female1 `repeat` times and once on synthetic cohorts of each of `sizes` subjects."""
+    results = {
+        "date": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "biomake": biomake.__version__,
+        "yeadon": yeadon.__version__,
+        "numpy": np.__version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "datasets": {"startup": startup(repeat), "female1": run([MEAS], repeat)},
+    }
+    with tempfile.TemporaryDirectory() as directory:
+        for n in sizes:
+            results["datasets"][f"synthetic{n}"] = run(synthetic_cohort(n, directory, seed))
+
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the phases of biomake.")
+    parser.add_argument(
+        "--sizes", nargs="*", type=int, default=[1, 100, 10000], help="number of subjects of the synthetic cohorts"
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=20, help="number of runs on female1 and of started processes (default: 20)"
+    )
+    parser.add_argument("--seed", type=int, default=0, help="seed of the synthetic cohorts")
+    parser.add_argument("-o", "--output", help="JSON file of the results (default: stdout)")
+    parser.add_argument("--compare", metavar="BASELINE", help="JSON results to compare the median times to")
+    parser.add_argument(
+        "--threshold", type=float, default=1.2, help="slowdown ratio reported as a regression (default: 1.2)"
+    )
+    args = parser.parse_args(argv)
+
+    # yeadon warns and prints about the stadia it fixes, which some synthetic subjects have
+    warnings.simplefilter("ignore")
+    with contextlib.redirect_stdout(sys.stderr):
+        results = benchmark(args.sizes, args.repeat, args.seed)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=1, default=float)
+    else:
+        json.dump(results, sys.stdout, indent=1, default=float)
+        print()
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s): {', '.join(regressions)}", file=sys.stderr)
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
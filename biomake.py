@@ -2,37 +2,518 @@
 # SPDX-License-Identifier: MIT
 # Copyright Francisco Pascoa <francisco.pascoa@umontreal.ca>
 
-from typing import Annotated, Literal, TypeVar
-import numpy.typing as npt
+from __future__ import annotations
+
+import ast
+import contextlib
+import copy
+import functools
+import glob
+import hashlib
+import importlib
+import itertools
+import json
+import os
+import pickle
+import sys
+import threading
+import time
+
+
+__version__ = "0.2.3"
+
+# like typing.TYPE_CHECKING, without importing typing
+TYPE_CHECKING = False
+
+
+class _LazyModule:
+    """Stand-in for the module `name`, imported on first attribute access.
+
+    `--help`, argument errors and cache hits then do not pay for importing numpy, yaml and yeadon.
+    """
+
+    def __init__(self, name: str, alias: str):
+        self._name = name
+        self._alias = alias
+
+    def __getattr__(self, attr):
+        module = importlib.import_module(self._name)
+        globals()[self._alias] = module
+        return getattr(module, attr)
 
-import numpy as np
-import yaml
-import yeadon
+
+if TYPE_CHECKING:
+    from typing import Annotated, Iterator, Literal, TypeVar
+
+    import numpy.typing as npt
+
+    import numpy as np
+    import yaml
+    import yeadon
+
+    # From [https://stackoverflow.com/questions/71109838/numpy-typing-with-specific-shape-and-datatype]
+    DType = TypeVar("DType", bound=np.generic)
+    Vec2 = Annotated[npt.NDArray[DType], Literal[2]]
+    Vec3 = Annotated[npt.NDArray[DType], Literal[3]]
+    Mat3x3 = Annotated[npt.NDArray[DType], Literal[3, 3]]
+else:
+    np = _LazyModule("numpy", "np")
+    yaml = _LazyModule("yaml", "yaml")
+    yeadon = _LazyModule("yeadon", "yeadon")
+
+
+O = (0.0, 0.0, 0.0)
+
+
+def format_numbers(numbers, precision: int = None) -> list[str]:
+    """Format all the floats of `numbers` (an array, flattened, or a sequence) at once for a bioMod.
+
+    Each float is written as its shortest repr, which is the same on every platform. With a `precision`, the floats
+    are first rounded to that many decimals (and -0.0 to 0.0), so that the noise below it does not change the bioMod.
+    Arrays are rounded by numpy and sequences (e.g. of a few options) one by one, to the same floats.
+    """
+    scale = None if precision is None else float(10**precision)
+    if isinstance(numbers, np.ndarray):
+        numbers = np.asarray(numbers, dtype=float)
+        if scale is not None:  # the floats from 2**52 (and inf and nan) have no decimals
+            numbers = numbers + 0.0
+            small = np.abs(numbers) < 2**52
+            numbers[small] = np.rint(numbers[small] * scale) / scale + 0.0
+        return list(map(repr, numbers.ravel().tolist()))
+
+    numbers = [float(x) for x in numbers]
+    if scale is not None:
+        numbers = [round(x * scale) / scale + 0.0 if abs(x) < 2**52 else x + 0.0 for x in numbers]
+    return list(map(repr, numbers))
+
+
+def format_vec(vec, precision: int = None) -> str:
+    """Format the vector `vec` for a bioMod. Its floats are formatted by `format_numbers`, its other items (e.g. ints
+    and expressions like "pi/2" from the options) are written as they are."""
+    if isinstance(vec, np.ndarray):
+        return " ".join(format_numbers(vec, precision))
+    texts = [str(v) for v in vec]
+    floats = [i for i, v in enumerate(vec) if isinstance(v, float)]
+    for i, text in zip(floats, format_numbers([vec[i] for i in floats], precision)):
+        texts[i] = text
+    return " ".join(texts)
+
+
+_OPERATORS = {
+    ast.Add: lambda a, b: a + b,
+    ast.Sub: lambda a, b: a - b,
+    ast.Mult: lambda a, b: a * b,
+    ast.Div: lambda a, b: a / b,
+    ast.USub: lambda a: -a,
+    ast.UAdd: lambda a: a,
+}
 
 
-# From [https://stackoverflow.com/questions/71109838/numpy-typing-with-specific-shape-and-datatype]
-DType = TypeVar("DType", bound=np.generic)
-Vec2 = Annotated[npt.NDArray[DType], Literal[2]]
-Vec3 = Annotated[npt.NDArray[DType], Literal[3]]
-Mat3x3 = Annotated[npt.NDArray[DType], Literal[3, 3]]
+def parse_number(value) -> float:
+    """Get the float of a bioMod number, which can be written as an arithmetic expression of `pi` (e.g. "-pi/2")."""
+    if not isinstance(value, str):
+        return float(value)
 
+    def evaluate(node):
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
+            return float(node.value)
+        if isinstance(node, ast.Name) and node.id == "pi":
+            return np.pi
+        if isinstance(node, ast.BinOp) and type(node.op) in _OPERATORS:
+            return _OPERATORS[type(node.op)](evaluate(node.left), evaluate(node.right))
+        if isinstance(node, ast.UnaryOp) and type(node.op) in _OPERATORS:
+            return _OPERATORS[type(node.op)](evaluate(node.operand))
+        raise ValueError(f"'{value}' is not a number.")
+
+    try:
+        return evaluate(ast.parse(value.strip(), mode="eval").body)
+    except SyntaxError:
+        raise ValueError(f"'{value}' is not a number.")
+
+
+def parse_vec(vec) -> list[float]:
+    """Get the floats of a vector of bioMod numbers, None if there is no vector."""
+    return None if vec is None else [parse_number(v) for v in vec]
 
-O = np.zeros(3)
+
+def format_mat(mat: Mat3x3, leading="", precision: int = None) -> str:
+    return _join_mat(format_numbers(np.asarray(mat), precision), leading)
 
 
-def format_vec(vec):
-    return ("{} " * len(vec)).format(*vec)[:-1]  # fancy
+def _join_mat(texts: list[str], leading="") -> str:
+    """Write the 9 formatted numbers `texts` of a matrix as its 3 lines."""
+    return (
+        f"{leading}{texts[0]} {texts[1]} {texts[2]}\n"
+        f"{leading}{texts[3]} {texts[4]} {texts[5]}\n"
+        f"{leading}{texts[6]} {texts[7]} {texts[8]}"
+    )
 
 
-def format_mat(mat: Mat3x3, leading=""):
-    return (
-        f"{leading}{mat[0, 0]} {mat[0, 1]} {mat[0, 2]}\n"
-        f"{leading}{mat[1, 0]} {mat[1, 1]} {mat[1, 2]}\n"
-        f"{leading}{mat[2, 0]} {mat[2, 1]} {mat[2, 2]}"
+class Profiler:
+    """Wall times of the phases of biomake and of the construction of each segment.
+
+    While a profiler is active (`with Profiler() as profiler:`), the blocks wrapped in `profile` are timed, and so are
+    the constructors of the segments. Nested phases are timed inclusively, e.g. the time of a segment includes the
+    `combine_inertia` it triggers.
+    """
+
+    def __init__(self):
+        self.timings = {"phases": {}, "segments": {}}
+        self.elapsed = 0.0
+        self._previous = None
+        self._start = None
+
+    def __enter__(self):
+        global _profiler
+        self._previous, _profiler = _profiler, self
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        global _profiler
+        self.elapsed += time.perf_counter() - self._start
+        _profiler = self._previous
+
+    def add(self, group: str, name: str, seconds: float, calls: int = 1):
+        """Add `calls` timings of `name` (a phase or a segment, as per `group`) lasting `seconds` in total."""
+        timing = self.timings[group].setdefault(name, [0, 0.0])
+        timing[0] += calls
+        timing[1] += seconds
+
+    def merge(self, report: dict):
+        """Add the timings of the `report` of another profiler, e.g. one of a worker process."""
+        for group in self.timings:
+            for name, timing in report[group].items():
+                self.add(group, name, timing["seconds"], timing["calls"])
+
+    def report(self) -> dict:
+        """Get the timings as `{"total": seconds, "phases": {name: {"calls": n, "seconds": s}}, "segments": {...}}`."""
+        report = {"total": self.elapsed}
+        for group, timings in self.timings.items():
+            report[group] = {name: {"calls": calls, "seconds": seconds} for name, (calls, seconds) in timings.items()}
+
+        return report
+
+    def dump(self, filename: str = "-"):
+        """Write the report as JSON to `filename`, or to stderr if it is "-"."""
+        if filename == "-":
+            json.dump(self.report(), sys.stderr, indent=1)
+            sys.stderr.write("\n")
+        else:
+            with open(filename, "w") as f:
+                json.dump(self.report(), f, indent=1)
+
+
+class _Timing:
+    __slots__ = ("profiler", "group", "name", "start")
+
+    def __init__(self, profiler: Profiler, group: str, name: str):
+        self.profiler = profiler
+        self.group = group
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.profiler.add(self.group, self.name, time.perf_counter() - self.start)
+
+
+_profiler = None
+_NOT_PROFILING = contextlib.nullcontext()
+
+
+def profile(name: str, group: str = "phases"):
+    """Time the `with` block as `name` on the active `Profiler`, if any."""
+    if _profiler is None:
+        return _NOT_PROFILING
+
+    return _Timing(_profiler, group, name)
+
+
+@contextlib.contextmanager
+def profiling(filename: str = None):
+    """Profile the `with` block and dump the report to `filename` (see `Profiler.dump`), if it is given."""
+    if not filename:
+        yield None
+        return
+
+    with Profiler() as profiler:
+        yield profiler
+    profiler.dump(filename)
+
+
+# The triangles of binary STL files (50 bytes each), after their 80 bytes header and their uint32 number of
+# triangles. A list rather than a numpy.dtype, not to import numpy.
+STL_DTYPE = [("normal", "<f4", (3,)), ("vertices", "<f4", (3, 3)), ("attribute", "<u2")]
+
+
+class StlMesh:
+    """Triangle mesh of an STL file.
+
+    `triangles` is (T, 3, 3) (triangle, vertex, coordinate) and `normals` is (T, 3). When read from a binary file,
+    both are views on the memory-mapped file.
+    """
+
+    def __init__(self, triangles: np.ndarray, normals: np.ndarray = None, name: str = ""):
+        self.triangles = triangles
+        self.normals = normals
+        self.name = name
+        self._indexed = None
+
+    def __len__(self):
+        return len(self.triangles)
+
+    def _index(self):
+        if self._indexed is None:
+            vertices, faces = np.unique(self.triangles.reshape(-1, 3), axis=0, return_inverse=True)
+            self._indexed = vertices, faces.reshape(-1, 3)
+        return self._indexed
+
+    @property
+    def vertices(self) -> np.ndarray:
+        """The (V, 3) distinct vertices of the mesh."""
+        return self._index()[0]
+
+    @property
+    def faces(self) -> np.ndarray:
+        """The (T, 3) indices in `vertices` of the vertices of each triangle."""
+        return self._index()[1]
+
+    @property
+    def bounds(self) -> tuple[Vec3, Vec3]:
+        """The lower and upper corners of the bounding box of the mesh."""
+        points = self.triangles.reshape(-1, 3)
+        return points.min(axis=0), points.max(axis=0)
+
+    @staticmethod
+    def from_faces(vertices: np.ndarray, faces: np.ndarray, name: str = "") -> "StlMesh":
+        """Get the mesh of the triangles `faces` (T, 3) indexing `vertices` (V, 3), with their normals computed."""
+        triangles = vertices[faces]
+        normals = np.cross(triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0])
+        norms = np.linalg.norm(normals, axis=1, keepdims=True)
+        mesh = StlMesh(triangles, normals / np.where(norms > 0, norms, 1.0), name)
+        mesh._indexed = vertices, faces
+        return mesh
+
+    def to_bytes(self) -> bytes:
+        """Get the binary STL file of the mesh."""
+        records = np.zeros(len(self), STL_DTYPE)
+        records["vertices"] = self.triangles
+        if self.normals is not None:
+            records["normal"] = self.normals
+        header = self.name.encode()[:80].ljust(80, b" ")
+        # binary files must not start with "solid", which is for ASCII files
+        if header.startswith(b"solid"):
+            header = b"mesh" + header[5:]
+
+        return header + np.uint32(len(self)).tobytes() + records.tobytes()
+
+    def save(self, filename: str):
+        with open(filename, "wb") as f:
+            f.write(self.to_bytes())
+
+
+def read_stl(filename: str) -> StlMesh:
+    """Read the binary or ASCII STL file `filename`.
+
+    Binary files are memory-mapped, the triangles are only read when they are used. Since some binary files start
+    with "solid" too, they are told apart from ASCII files by their size.
+    """
+    with profile("read_stl"):
+        size = os.path.getsize(filename)
+        with open(filename, "rb") as f:
+            header = f.read(84)
+        if len(header) == 84:
+            count = int(np.frombuffer(header, "<u4", 1, 80)[0])
+            if size == 84 + count * 50:
+                if not count:
+                    return StlMesh(np.empty((0, 3, 3), np.float32), np.empty((0, 3), np.float32))
+                records = np.memmap(filename, STL_DTYPE, "r", 84, (count,))
+                name = header[:80].rstrip(b"\0 ").decode(errors="replace")
+                return StlMesh(records["vertices"], records["normal"], name)
+
+        return _read_ascii_stl(filename)
+
+
+def _read_ascii_stl(filename: str) -> StlMesh:
+    with open(filename) as f:
+        words = f.read().split()
+    if not words or words[0] != "solid":
+        raise ValueError(f"{filename} is not an STL file.")
+
+    words = np.array(words)
+    try:
+        at = np.flatnonzero(words == "vertex")
+        triangles = words[at[:, None] + np.arange(1, 4)].astype(float).reshape(-1, 3, 3)
+        at = np.flatnonzero(words == "normal")
+        normals = words[at[:, None] + np.arange(1, 4)].astype(float)
+    except (IndexError, ValueError):
+        raise ValueError(f"{filename} is not a valid ASCII STL file.")
+    if len(normals) != len(triangles):
+        raise ValueError(f"{filename} is not a valid ASCII STL file.")
+
+    name = " ".join(words[1 : np.argmax(words == "facet")])
+    return StlMesh(triangles, normals, name)
+
+
+def decimate(mesh: StlMesh, triangles: int) -> StlMesh:
+    """Simplify `mesh` to at most `triangles` triangles by clustering its vertices.
+
+    The vertices in each cell of a regular grid are merged into their mean, and the triangles that become degenerate
+    or duplicated are dropped. The finest grid giving at most `triangles` triangles is found by bisection.
+    """
+    if len(mesh) <= triangles:
+        return mesh
+
+    # the degenerate and duplicated triangles of the mesh itself would never be split apart by a finer grid
+    faces = mesh.faces
+    a, b, c = faces.T
+    faces = faces[(a != b) & (b != c) & (a != c)]
+    _, first = np.unique(np.sort(faces, axis=1), axis=0, return_index=True)
+    faces = faces[np.sort(first)]
+    if len(faces) <= triangles:
+        return StlMesh.from_faces(mesh.vertices, faces, mesh.name)
+
+    vertices = mesh.vertices.astype(float)
+    lower, upper = vertices.min(axis=0), vertices.max(axis=0)
+    extent = max(float((upper - lower).max()), np.finfo(float).tiny)
+
+    def cluster(cells: int) -> tuple[np.ndarray, np.ndarray]:
+        """Get the cluster of each vertex and the remaining faces for a grid of `cells` along the longest side."""
+        grid = np.minimum(np.floor((vertices - lower) * (cells / extent)), cells - 1).astype(np.int64)
+        keys = (grid[:, 0] * cells + grid[:, 1]) * cells + grid[:, 2]
+        _, clusters = np.unique(keys, return_inverse=True)
+        clustered = clusters.reshape(-1)[faces]
+        a, b, c = clustered.T
+        clustered = clustered[(a != b) & (b != c) & (a != c)]
+        _, first = np.unique(np.sort(clustered, axis=1), axis=0, return_index=True)
+        return clusters.reshape(-1), clustered[np.sort(first)]
+
+    # the coarsest grid is a single cell, without triangles, and the keys of the finest one fit in int64
+    coarse, fine, max_cells = 1, None, 2**20
+    result = cluster(coarse)
+    while fine is None and coarse < max_cells:
+        clusters, clustered = cluster(2 * coarse)
+        if len(clustered) > triangles:
+            fine = 2 * coarse
+        else:
+            coarse, result = 2 * coarse, (clusters, clustered)
+    while fine is not None and fine - coarse > 1:
+        middle = (coarse + fine) // 2
+        clusters, clustered = cluster(middle)
+        if len(clustered) > triangles:
+            fine = middle
+        else:
+            coarse, result = middle, (clusters, clustered)
+
+    clusters, clustered = result
+    counts = np.bincount(clusters)
+    means = np.stack([np.bincount(clusters, vertices[:, i]) for i in range(3)], axis=1) / counts[:, None]
+
+    return StlMesh.from_faces(means, clustered, mesh.name)
+
+
+def mesh_inertia(mesh: StlMesh, density: float, transform: tuple = None) -> tuple[float, Vec3, Mat3x3]:
+    """Get the mass, COM and inertia about the COM of the solid of uniform `density` bounded by the closed `mesh`.
+
+    The volume integrals are turned into sums over the tetrahedra joining the origin to each triangle (divergence
+    theorem), evaluated for all the triangles at once. `transform` is the `(scale, rotation, translation)` placing the
+    mesh in the frame of the result, like `meshscale`, `meshrt` and `meshxyz`.
+    """
+    # coordinates first, so that each coordinate of the vertices of the triangles is contiguous
+    points = np.asarray(np.reshape(mesh.triangles, (-1, 9)).T, dtype=float, order="C")
+    a, b, c = points[0:3], points[3:6], points[6:9]
+    if transform is not None:
+        scale, rotation, translation = transform
+        a, b, c = (rotation @ (np.reshape(scale, (3, 1)) * p) + np.reshape(translation, (3, 1)) for p in (a, b, c))
+
+    # the normals of a closed surface, weighted by the areas of the triangles, sum to zero
+    u, v = b - a, c - a
+    normals = np.stack([u[1] * v[2] - u[2] * v[1], u[2] * v[0] - u[0] * v[2], u[0] * v[1] - u[1] * v[0]])
+    if np.linalg.norm(normals.sum(axis=1)) > 1e-6 * np.sqrt(np.einsum("it,it->t", normals, normals)).sum():
+        raise ValueError("The mesh is not closed.")
+
+    # a . (b x c) = a . ((b - a) x (c - a))
+    volumes = np.einsum("it,it->t", a, normals) / 6.0
+    volume = volumes.sum()
+    if volume < 0:  # the normals point inward
+        volumes, volume = -volumes, -volume
+    mass = density * volume
+    s = a + b + c
+    com = s @ volumes / (4.0 * volume)
+
+    # second moments about the origin, sum of those of the tetrahedra: v/20 (aa' + bb' + cc' + ss')
+    weights = volumes / 20.0
+    moments = sum((p * weights) @ p.T for p in (a, b, c, s))
+    inertia = density * (np.trace(moments) * np.eye(3) - moments)
+    # parallel axis theorem
+    inertia -= mass * (com @ com * np.eye(3) - np.outer(com, com))
+
+    return mass, com, inertia
+
+
+_decimated_meshes = {}
+
+
+def decimated_mesh(path: str, triangles: int, cache: "FileCache") -> str:
+    """Get the path of the copy of the STL mesh `path` decimated to `triangles` triangles (see `decimate`) in `cache`.
+
+    The copies are keyed by the content of the meshes, so each mesh is only decimated once, whatever its path.
+    """
+    stamp = file_stamp(path), triangles, os.path.abspath(cache.directory)
+    if stamp not in _decimated_meshes:
+        with open(path, "rb") as f:
+            key = FileCache.key(b"decimate", __version__.encode(), b"%d" % triangles, f.read())
+        if cache.get(key) is None:
+            with profile("decimate"):
+                cache.put(key, decimate(read_stl(path), triangles).to_bytes())
+        _decimated_meshes[stamp] = os.path.abspath(cache.path(key))
+    return _decimated_meshes[stamp]
+
+
+def resolve_meshfile(meshfile: str, mesh_dir: str = None) -> str:
+    """Get the path of `meshfile`, which is relative to `mesh_dir` (usually the bioMod's directory) if it is given."""
+    return meshfile if mesh_dir is None or os.path.isabs(meshfile) else os.path.join(mesh_dir, meshfile)
+
+
+def rotation_xyz(angles: Vec3) -> Mat3x3:
+    """Get the rotation matrix of the bioMod `rt` angles, which are in the "xyz" sequence."""
+    (cx, cy, cz), (sx, sy, sz) = np.cos(angles), np.sin(angles)
+    return np.array(
+        [
+            [cy * cz, -cy * sz, sy],
+            [sx * sy * cz + cx * sz, -sx * sy * sz + cx * cz, -sx * cy],
+            [-cx * sy * cz + sx * sz, cx * sy * sz + sx * cz, cx * cy],
+        ]
     )
 
 
+def file_stamp(path: str) -> tuple[str, int, int]:
+    """Get the real path, size and modification time of the file `path`, which change when it is edited."""
+    stat = os.stat(path)
+    return os.path.realpath(path), stat.st_size, stat.st_mtime_ns
+
+
+_mesh_extents = {}
+
+
+def mesh_extent(path: str, rt: Vec3 = None) -> float:
+    """Get the extent along z of the STL mesh `path` once rotated by the bioMod `meshrt` angles `rt`.
+
+    The extents are cached by the `file_stamp` of the mesh, so a mesh shared by many segments or humans is only read
+    once per process.
+    """
+    key = file_stamp(path), None if rt is None else tuple(rt)
+    if key not in _mesh_extents:
+        z = read_stl(path).triangles.reshape(-1, 3) @ (rotation_xyz(rt)[2] if rt is not None else np.eye(3)[2])
+        _mesh_extents[key] = float(z.max() - z.min()) if len(z) else 0.0
+    return _mesh_extents[key]
+
+
 class BioModMarker:
+    __slots__ = ("label", "parent", "position", "technical", "anatomical", "axestoremove")
+
     def __init__(self, label: str, parent: str, position: Vec3, technical: int, anatomical: int, axestoremove: str):
         self.label = label
         self.parent = parent
@@ -41,19 +522,22 @@ class BioModMarker:
         self.anatomical = anatomical
         self.axestoremove = axestoremove
 
-    def __str__(self):
-        mod = f"\tmarker {self.label}\n"
-        mod += f"\t\tparent {self.parent}\n"
-        mod += f"\t\tposition {format_vec(self.position)}\n"
+    def iter_lines(self, precision: int = None):
+        """Iterate over the lines (without line ending) of the marker's bioMod declaration, with the numbers rounded
+        to `precision` decimals if given (see `format_numbers`)."""
+        yield f"\tmarker {self.label}"
+        yield f"\t\tparent {self.parent}"
+        yield f"\t\tposition {format_vec(self.position, precision)}"
         if self.technical is not None:
-            mod += f"\t\ttechnical {self.technical}\n"
+            yield f"\t\ttechnical {self.technical}"
         if self.anatomical is not None:
-            mod += f"\t\tanatomical {self.anatomical}\n"
+            yield f"\t\tanatomical {self.anatomical}"
         if self.axestoremove:
-            mod += f"\t\taxestoremove {self.axestoremove}\n"
-        mod += "\tendmarker"
+            yield f"\t\taxestoremove {self.axestoremove}"
+        yield "\tendmarker"
 
-        return mod
+    def __str__(self):
+        return "\n".join(self.iter_lines())
 
 
 # TODO: move to a @classmethod in BioModMarker
@@ -73,6 +557,32 @@ def parse_markers(parent: str, markers_desc: dict[dict]):
 
 
 class BioModSegment:
+    """Segment of a bioMod, with the markers attached to it.
+
+    Its numbers `xyz`, `com`, `mass` and `inertia` are stored in this order in the (16,) array `parameters`, which is
+    a row of the `parameters` of the `BioModModel` it belongs to.
+    """
+
+    __slots__ = (
+        "label",
+        "parent",
+        "rt",
+        "translations",
+        "rotations",
+        "rangesQ",
+        "mesh",
+        "meshfile",
+        "meshcolor",
+        "meshscale",
+        "meshrt",
+        "meshxyz",
+        "patch",
+        "markers",
+        "meshdensity",
+        "alternative_inertia",
+        "parameters",
+    )
+
     def __init__(
         self,
         label: str,
@@ -93,7 +603,9 @@ class BioModSegment:
         meshxyz: Vec3,
         patch: list[Vec3],
         markers: list[BioModMarker],
+        meshdensity: float = None,
     ):
+        self.parameters = np.empty(16)
         self.label = label
         self.parent = parent
         self.rt = rt
@@ -112,53 +624,99 @@ class BioModSegment:
         self.meshxyz = meshxyz
         self.patch = patch
         self.markers = markers
-
-    def __str__(self):
-        mod = f"segment {self.label}\n"
+        self.meshdensity = meshdensity
+        self.alternative_inertia = None
+
+    @property
+    def xyz(self) -> Vec3:
+        return self.parameters[0:3]
+
+    @xyz.setter
+    def xyz(self, xyz: Vec3):
+        self.parameters[0:3] = xyz
+
+    @property
+    def com(self) -> Vec3:
+        return self.parameters[3:6]
+
+    @com.setter
+    def com(self, com: Vec3):
+        self.parameters[3:6] = com
+
+    @property
+    def mass(self) -> float:
+        return self.parameters[6]
+
+    @mass.setter
+    def mass(self, mass: float):
+        self.parameters[6] = mass
+
+    @property
+    def inertia(self) -> Mat3x3:
+        return self.parameters[7:16].reshape(3, 3)
+
+    @inertia.setter
+    def inertia(self, inertia: Mat3x3):
+        self.parameters[7:16] = np.asarray(inertia).reshape(9)
+
+    def iter_lines(self, precision: int = None, numbers: list[str] = None):
+        """Iterate over the lines (without line ending) of the segment's and its markers' bioMod declarations.
+
+        The numbers are rounded to `precision` decimals if given (see `format_numbers`). `numbers` are the already
+        formatted `parameters`, e.g. by `BioModModel.format_parameters`.
+        """
+        if numbers is None:
+            numbers = format_numbers(self.parameters, precision)
+        yield f"segment {self.label}"
         if self.parent:
-            mod += f"\tparent {self.parent}\n"
-        mod += f"\trt {format_vec(self.rt)} xyz {format_vec(self.xyz)}\n"
+            yield f"\tparent {self.parent}"
+        yield f"\trt {format_vec(self.rt, precision)} xyz {' '.join(numbers[0:3])}"
         if self.translations:
-            mod += f"\ttranslations {self.translations}\n"
+            yield f"\ttranslations {self.translations}"
         if self.rotations:
-            mod += f"\trotations {self.rotations}\n"
+            yield f"\trotations {self.rotations}"
         if self.rangesQ:
-            mod += f"\trangesQ\n"
+            yield f"\trangesQ"
             for r in self.rangesQ:
-                mod += f"\t\t{format_vec(r)}\n"
-        mod += f"\tcom {format_vec(self.com)}\n"
-        mod += f"\tmass {self.mass}\n"
-        mod += f"\tinertia\n" + format_mat(self.inertia, leading="\t\t") + "\n"
+                yield f"\t\t{format_vec(r, precision)}"
+        yield f"\tcom {' '.join(numbers[3:6])}"
+        yield f"\tmass {numbers[6]}"
+        yield f"\tinertia"
+        yield _join_mat(numbers[7:16], leading="\t\t")
+        if self.alternative_inertia:
+            source, mass, com, inertia = self.alternative_inertia
+            yield f"\t// {source} com {format_vec(com, precision)}"
+            yield f"\t// {source} mass {format_numbers([mass], precision)[0]}"
+            yield f"\t// {source} inertia"
+            yield format_mat(inertia, leading="\t//\t", precision=precision)
         if self.meshfile:
-            mod += f"\tmeshfile {self.meshfile}\n"
+            yield f"\tmeshfile {self.meshfile}"
         elif self.mesh:
             for m in self.mesh:
-                mod += f"\tmesh {format_vec(m)}\n"
+                yield f"\tmesh {format_vec(m, precision)}"
         if self.meshcolor:
-            mod += f"\tmeshcolor {format_vec(self.meshcolor)}\n"
+            yield f"\tmeshcolor {format_vec(self.meshcolor, precision)}"
         if self.meshscale:
-            mod += f"\tmeshscale {format_vec(self.meshscale)}\n"
+            yield f"\tmeshscale {format_vec(self.meshscale, precision)}"
         if self.meshrt and self.meshxyz:
-            mod += f"\tmeshrt {format_vec(self.meshrt)} xyz {format_vec(self.meshxyz)}\n"
+            yield f"\tmeshrt {format_vec(self.meshrt, precision)} xyz {format_vec(self.meshxyz, precision)}"
         if self.patch:
             for p in self.patch:
-                mod += f"\tpatch {format_vec(p)}\n"
-        mod += "endsegment"
+                yield f"\tpatch {format_vec(p, precision)}"
+        yield "endsegment"
 
-        if self.markers:
-            mod += "\n\n"
-            for i, m in enumerate(self.markers):
-                mod += str(m)
-                if i < len(self.markers) - 1:
-                    mod += "\n\n"
-
-        return mod
+        for m in self.markers:
+            yield ""
+            yield from m.iter_lines(precision)
 
+    def __str__(self):
+        return "\n".join(self.iter_lines())
 
-class Pelvis(BioModSegment):
-    def __init__(
-        self,
-        human: yeadon.Human,
+    @staticmethod
+    def from_geometry(
+        geometry: HumanGeometry,
+        name: str,
+        parent: str = None,
         label: str = "",
         rt: Vec3 = O,
         translations: str = "",
@@ -172,19 +730,16 @@ class Pelvis(BioModSegment):
         meshxyz: Vec3 = None,
         patch: list[Vec3] = None,
         markers: dict[dict] = {},
-    ):
-        label = label or Pelvis.__name__
-        parent = None
-
-        xyz = Pelvis.get_origin(human)
-        com = O
-        mass = human.P.mass
-        inertia = human.P.rel_inertia
+        meshdensity: float = None,
+    ) -> "BioModSegment":
+        """Build the segment `name` of `SEGMENTS` (e.g. "LeftHand") of the human of `geometry`.
 
-        markers = parse_markers(label, markers)
+        `parent` is the label of its parent segment and the other arguments are the segment's options.
+        """
+        label = label or name
+        xyz, mass, com, inertia = geometry.parameters(name)
 
-        BioModSegment.__init__(
-            self,
+        return BioModSegment(
             label=label,
             parent=parent,
             rt=rt,
@@ -202,1243 +757,2420 @@ class Pelvis(BioModSegment):
             meshrt=meshrt,
             meshxyz=meshxyz,
             patch=patch,
-            markers=markers,
+            markers=parse_markers(label, markers),
+            meshdensity=meshdensity,
         )
 
-    @staticmethod
-    def get_origin(human: yeadon.Human) -> Vec3:
-        """Get the origin of the Pelvis in the global frame centered at Pelvis' COM."""
-        return O
 
+# The solids of yeadon, in the order of its segments' solids.
+SOLIDS = (
+    ("s0", "s1", "s2", "s3", "s4", "s5", "s6", "s7")
+    + tuple(f"a{i}" for i in range(7))
+    + tuple(f"b{i}" for i in range(7))
+    + tuple(f"j{i}" for i in range(9))
+    + tuple(f"k{i}" for i in range(9))
+)
+
+# The segments the models are made of, as `label: (parent, solids, origin solids, yeadon inertia, yeadon origin)`.
+# `Cohort` combines the solids, the origin being the mean of the proximal ends of the origin solids or the COM if ().
+# `HumanGeometry` gets the inertial parameters from the yeadon objects instead: those of a segment ("segment", "A1"),
+# of some solids of a segment ("solids", "A2", start, stop) or of objects combined in the global frame ("combine",
+# "T", "s3", "s4"). The yeadon origin `(segments, n)` is the mean position of the yeadon `segments` moved along them by
+# the mean height of their first `n` solids, or Pelvis' COM if `segments` is ().
+SEGMENTS = {
+    "Pelvis": (None, ("s0", "s1"), (), ("segment", "P"), ((), 0)),
+    "Thorax": ("Pelvis", ("s2", "s3", "s4"), ("s2",), ("combine", "T", "s3", "s4"), (("T",), 0)),
+    "Head": ("Thorax", ("s5", "s6", "s7"), ("s5",), ("combine", "s5", "s6", "s7"), (("C",), 2)),
+    "RightUpperArm": ("Thorax", ("b0", "b1"), ("b0",), ("segment", "B1"), (("B1",), 0)),
+    "RightForearm": ("RightUpperArm", ("b2", "b3"), ("b2",), ("solids", "B2", None, 2), (("B2",), 0)),
+    "RightHand": ("RightForearm", ("b4", "b5", "b6"), ("b4",), ("solids", "B2", 2, None), (("B2",), 2)),
+    "LeftUpperArm": ("Thorax", ("a0", "a1"), ("a0",), ("segment", "A1"), (("A1",), 0)),
+    "LeftForearm": ("LeftUpperArm", ("a2", "a3"), ("a2",), ("solids", "A2", None, 2), (("A2",), 0)),
+    "LeftHand": ("LeftForearm", ("a4", "a5", "a6"), ("a4",), ("solids", "A2", 2, None), (("A2",), 2)),
+    "RightThigh": ("Pelvis", ("k0", "k1", "k2"), ("k0",), ("segment", "K1"), (("K1",), 0)),
+    "RightShank": ("RightThigh", ("k3", "k4"), ("k3",), ("solids", "K2", None, 2), (("K2",), 0)),
+    "RightFoot": ("RightShank", ("k5", "k6", "k7", "k8"), ("k5",), ("solids", "K2", 2, None), (("K2",), 2)),
+    "LeftThigh": ("Pelvis", ("j0", "j1", "j2"), ("j0",), ("segment", "J1"), (("J1",), 0)),
+    "LeftShank": ("LeftThigh", ("j3", "j4"), ("j3",), ("solids", "J2", None, 2), (("J2",), 0)),
+    "LeftFoot": ("LeftShank", ("j5", "j6", "j7", "j8"), ("j5",), ("solids", "J2", 2, None), (("J2",), 2)),
+    "Thighs": ("Pelvis", ("j0", "j1", "j2", "k0", "k1", "k2"), ("s0",), ("combine", "J1", "K1"), (("P",), 0)),
+    "Shanks": (
+        "Thighs",
+        ("j3", "j4", "k3", "k4"),
+        ("j3", "k3"),
+        ("combine", "j3", "j4", "k3", "k4"),
+        (("J2", "K2"), 0),
+    ),
+    "Feet": (
+        "Shanks",
+        ("j5", "j6", "j7", "j8", "k5", "k6", "k7", "k8"),
+        ("j5", "k5"),
+        ("combine", "j5", "j6", "j7", "j8", "k5", "k6", "k7", "k8"),
+        (("J2", "K2"), 2),
+    ),
+}
+
+# The segments of BioModHuman and BioModHumanFusedLegs, in the order of the bioMods.
+HUMAN_SEGMENTS = (
+    "Pelvis",
+    "Thorax",
+    "Head",
+    "RightUpperArm",
+    "RightForearm",
+    "RightHand",
+    "LeftUpperArm",
+    "LeftForearm",
+    "LeftHand",
+    "RightThigh",
+    "RightShank",
+    "RightFoot",
+    "LeftThigh",
+    "LeftShank",
+    "LeftFoot",
+)
+FUSED_LEGS_SEGMENTS = HUMAN_SEGMENTS[:9] + ("Thighs", "Shanks", "Feet")
+
+
+class HumanGeometry:
+    """Origins and inertial properties of the segments of a `yeadon.Human`.
+
+    Each quantity is computed on first use and then shared by all the segments built from this geometry.
+    With the "yeadon" `backend`, the segments' parameters are computed by the yeadon objects of `SEGMENTS`. With the
+    "native" one, all the segments are combined at once from the human's solids by `Cohort`, which is several times
+    faster but differs from yeadon by rounding errors.
+    """
+
+    def __init__(self, human: yeadon.Human, backend: Literal["yeadon", "native"] = "yeadon"):
+        if backend not in ("yeadon", "native"):
+            raise ValueError(f"Unknown backend {backend}, use yeadon or native.")
+        self.human = human
+        self.backend = backend
+        self._cohort = None
+        self._origins = {}
+        self._segments = {}
+        self._solids = {}
+        self._combined = {}
+        self._heights = None
+        self._lengths = {}
+
+    @staticmethod
+    def of(human) -> "HumanGeometry":
+        """Get the geometry of `human`, which can already be a `HumanGeometry`."""
+        return human if isinstance(human, HumanGeometry) else HumanGeometry(human)
+
+    def origin(self, segment: str) -> Vec3:
+        """Get the origin of the segment `segment` (e.g. "LeftHand") in the global frame centered at Pelvis' COM."""
+        if segment not in self._origins:
+            with profile("origin"):
+                names, n = SEGMENTS[segment][4]
+                if not names:
+                    self._origins[segment] = np.zeros(3)
+                    return self._origins[segment]
+                segments = [getattr(self.human, name) for name in names]
+                pos = segments[0].pos
+                if len(segments) > 1:
+                    pos = sum((s.pos for s in segments[1:]), pos) / len(segments)
+                if n:
+                    length = sum(solid.height for s in segments for solid in s.solids[:n]) / len(segments)
+                    dir = segments[0].end_pos - segments[0].pos
+                    if len(segments) > 1:
+                        dir = sum((s.end_pos - s.pos for s in segments[1:]), dir) / len(segments)
+                    dir = dir / np.linalg.norm(dir)
+                    pos = pos + length * dir
+                self._origins[segment] = np.asarray(pos - self.human.P.center_of_mass).reshape(3)
+        return self._origins[segment]
+
+    def parameters(self, segment: str) -> tuple[Vec3, float, Vec3, Mat3x3]:
+        """Get the origin (relative to its parent's), mass, COM (relative to its origin) and inertia of `segment`.
+
+        The axes of all the segments are aligned with the global frame, so the inertias need no rotation.
+        """
+        if self.backend == "native":
+            if self._cohort is None:
+                with profile("Cohort"):
+                    self._cohort = Cohort(SolidsArrays.from_humans([self.human]), labels=tuple(SEGMENTS))
+            i = self._cohort.labels.index(segment)
+            return self._cohort.xyz[0, i], self._cohort.mass[0, i], self._cohort.com[0, i], self._cohort.inertia[0, i]
+
+        parent, _, _, (kind, *args), (origin_segments, _) = SEGMENTS[segment]
+        xyz = self.origin(segment) - self.origin(parent) if parent else self.origin(segment)
+        if kind == "segment":
+            mass, com, inertia = self.segment_inertia(*args)
+        elif kind == "solids":
+            mass, com, inertia = self.solids_inertia(*args)
+        else:
+            mass, com_global, inertia = self.combine_inertia(tuple(args))
+            com = com_global - self.origin(segment)
+        if not origin_segments:  # the origin is the COM
+            com = np.zeros(3)
+
+        return xyz, mass, com, inertia
+
+    def segment_inertia(self, name: str) -> tuple[float, Vec3, Mat3x3]:
+        """Get the mass, relative COM and relative inertia of the yeadon segment `name` (e.g. "A1")."""
+        if name not in self._segments:
+            with profile("segment_inertia"):
+                segment = getattr(self.human, name)
+                self._segments[name] = (
+                    segment.mass,
+                    np.asarray(segment.rel_center_of_mass).reshape(3),
+                    segment.rel_inertia,
+                )
+        return self._segments[name]
+
+    def solids_inertia(self, name: str, start: int = None, stop: int = None) -> tuple[float, Vec3, Mat3x3]:
+        """Get the mass, relative COM and relative inertia of the solids `start:stop` of the yeadon segment `name`."""
+        key = name, start, stop
+        if key not in self._solids:
+            with profile("solids_inertia"):
+                # copies because Segment moves its solids
+                solids = [copy.copy(solid) for solid in getattr(self.human, name).solids[start:stop]]
+                # using Segment to have rel_inertia
+                segment = yeadon.segment.Segment("", np.zeros((3, 1)), np.eye(3), solids, np.zeros(3), False)
+                self._solids[key] = (
+                    segment.mass,
+                    np.asarray(segment.rel_center_of_mass).reshape(3),
+                    segment.rel_inertia,
+                )
+        return self._solids[key]
+
+    def combine_inertia(self, objlist: tuple[str]) -> tuple[float, Vec3, Mat3x3]:
+        """Get `yeadon.Human.combine_inertia(objlist)` with the COM in the global frame centered at Pelvis' COM."""
+        if objlist not in self._combined:
+            with profile("combine_inertia"):
+                mass, com_global, inertia_global = self.human.combine_inertia(objlist)
+            com = np.asarray(com_global - self.human.P.center_of_mass).reshape(3)
+            self._combined[objlist] = mass, com, inertia_global
+        return self._combined[objlist]
+
+    def length(self, segment: str) -> float:
+        """Get the length of the segment `segment` (e.g. "LeftHand"), which is the sum of the heights of its solids.
+
+        The lengths of the limbs of fused segments (e.g. "Feet") are averaged.
+        """
+        if segment not in self._lengths:
+            if self._heights is None:
+                solids = [solid for yeadon_segment in self.human.segments for solid in yeadon_segment.solids]
+                self._heights = {solid.label.split(":")[0]: solid.height for solid in solids}
+            solids = SEGMENTS[segment][1]
+            limbs = len({solid[0] for solid in solids})
+            self._lengths[segment] = sum(self._heights[solid] for solid in solids) / limbs
+        return self._lengths[segment]
+
+
+class BioModModel:
+    """bioMod model of a human made of the `segment_names` (in the bioMod's order) of `SEGMENTS`.
+
+    The `segments_options` are the options of each segment, by name (see `BioModSegment.from_geometry`), and `backend`
+    is that of the `HumanGeometry`. `human` can also be a `HumanGeometry`, to share its computations with other
+    models of the human, or the `BioModGeometry` of a bioMod, to rebuild it with other options.
+    Subclasses define `segment_names` and `iter_lines`.
+    The numbers of the segments are the rows of the (S, 16) array `parameters` (see `BioModSegment`). They are written
+    with `precision` decimals if given, and as their shortest repr otherwise (see `format_numbers`).
+
+    An `incremental` model keeps the `inputs` (options and meshes) of each segment and their bioMod `texts` once
+    written, so their segments should not be changed afterwards. A model built with the `previous` (incremental) model
+    of the same human and backend reuses the segments whose inputs did not change, along with their texts, and only
+    builds and writes the others.
+
+    `BioModModel(human, ...)` itself, the model of the option files without `Human: fused`, builds the model of the
+    bioMod if `human` is a `BioModGeometry`, and a `BioModHuman` otherwise.
+    """
+
+    __slots__ = ("gravity", "segments", "parameters", "precision", "inputs", "texts")
+
+    segment_names = ()
+
+    def __new__(cls, human=None, *args, **kwargs):
+        if cls is BioModModel:
+            cls = type(human.model) if isinstance(human, BioModGeometry) else BioModHuman
+        return super().__new__(cls)
 
-class Thorax(BioModSegment):
     def __init__(
         self,
         human: yeadon.Human,
-        label: str = "",
-        parent: str = Pelvis.__name__,
-        rt: Vec3 = O,
-        rotations: str = "",
-        rangesQ: list[Vec2] = None,
-        mesh: list[Vec3] = [(0, 0, 0)],
-        meshfile: str = None,
-        meshcolor: Vec3 = None,
-        meshscale: Vec3 = None,
-        meshrt: Vec3 = None,
-        meshxyz: Vec3 = None,
-        patch: list[Vec3] = None,
-        markers: dict[dict] = {},
+        gravity: Vec3 = None,
+        meshdir: str = None,
+        decimate: int = None,
+        meshcache: str = None,
+        meshinertia: Literal["compare", "replace"] = "compare",
+        backend: Literal["yeadon", "native"] = "yeadon",
+        precision: int = None,
+        incremental: bool = False,
+        previous: "BioModModel" = None,
+        **segments_options,
     ):
-        label = label or Thorax.__name__
+        if precision is not None and (not isinstance(precision, int) or precision < 0):
+            raise ValueError(f"The precision must be a number of decimals, not {precision}.")
+        self.gravity = gravity
+        self.precision = precision
+        if isinstance(human, BioModGeometry):
+            if type(human.model) is not type(self):
+                raise ValueError(f"A {type(self).__name__} cannot be built from a {type(human.model).__name__}.")
+            geometry = human
+        elif isinstance(human, HumanGeometry) and human.backend == backend:
+            geometry = human
+        else:
+            geometry = HumanGeometry(human.human if isinstance(human, HumanGeometry) else human, backend)
+        if previous is not None and (previous.inputs is None or type(previous) is not type(self)):
+            previous = None
+        incremental = incremental or previous is not None
+        self.inputs = [] if incremental else None
+        self.texts = [] if incremental else None
+        self.segments = []
+        labels = {}
+        built = []
+        for i, name in enumerate(self.segment_names):
+            parent, options = labels.get(SEGMENTS[name][0]), segments_options.get(name, {})
+            if incremental:
+                meshes = mesh_dependencies((type(self), {"meshdir": meshdir, "decimate": decimate}, {name: options}))
+                inputs = [parent, options, meshdir, decimate, meshcache, meshinertia, backend, precision]
+                self.inputs.append(json.dumps(inputs + [file_stamp(m) for m in meshes], default=str))
+            if previous is not None and previous.inputs[i] == self.inputs[i]:
+                segment = previous.segments[i]
+                self.texts.append(previous.texts[i])
+            else:
+                with profile(name, "segments"):
+                    segment = BioModSegment.from_geometry(geometry, name, parent, **options)
+                built.append(i)
+                if incremental:
+                    self.texts.append(None)
+            labels[name] = segment.label
+            self.segments.append(segment)
+        self.share_parameters()
+        self.fit_meshes(geometry, meshdir, built)
+        self.compute_mesh_inertias(meshdir, meshinertia == "replace", built)
+        if decimate:
+            self.decimate_meshes(decimate, meshdir, meshcache, built)
+
+    @classmethod
+    def from_segments(cls, segments: list[BioModSegment], gravity: Vec3 = None) -> "BioModModel":
+        """Get the model made of `segments`, in the order of `segment_names` (e.g. read by `read_biomod`)."""
+        model = cls.__new__(cls)
+        model.gravity = gravity
+        model.segments = segments
+        model.precision = None
+        model.inputs = model.texts = None
+        model.share_parameters()
+
+        return model
+
+    def share_parameters(self):
+        """Gather the numbers of the segments in one array, `parameters`, whose rows become theirs."""
+        self.parameters = np.array([segment.parameters for segment in self.segments])
+        for segment, parameters in zip(self.segments, self.parameters):
+            segment.parameters = parameters
+
+    def format_parameters(self) -> list[list[str]]:
+        """Format the `parameters` of the segments at once, as the 16 numbers of each segment.
+
+        Those of the segments whose text is kept (see `segment_lines`) are not formatted, and are None.
+        """
+        numbers = [None] * len(self.segments)
+        rows = [i for i, text in enumerate(self.texts or numbers) if text is None]
+        if rows:
+            with profile("format_parameters"):
+                texts = format_numbers(self.parameters[rows], self.precision)
+            for i, row in enumerate(rows):
+                numbers[row] = texts[16 * i : 16 * i + 16]
+        return numbers
+
+    def segment_lines(self, i: int, numbers: list[str] = None):
+        """Iterate over the lines of the bioMod declarations of the `i`th segment, kept if the model is incremental.
+
+        `numbers` are its formatted parameters (see `format_parameters`).
+        """
+        if self.texts is None:
+            return self.segments[i].iter_lines(self.precision, numbers)
+        if self.texts[i] is None:
+            self.texts[i] = list(self.segments[i].iter_lines(self.precision, numbers))
+        return self.texts[i]
+
+    def write(self, stream):
+        """Write the bioMod to the text `stream` line by line."""
+        with profile("write"):
+            stream.writelines(f"{line}\n" for line in self.iter_lines())
 
-        xyz = Thorax.get_origin(human) - Pelvis.get_origin(human)
-        translations = ""
+    def __str__(self):
+        with profile("str"):
+            return "".join(f"{line}\n" for line in self.iter_lines())
+
+    def fit_meshes(self, geometry: HumanGeometry, meshdir: str = None, indices: list[int] = None):
+        """Replace the `meshscale` "auto" of the segments by the scale fitting their `meshfile` to the human.
+
+        The uniform scale makes the extent of the mesh along z (once rotated by `meshrt`) equal to the length of the
+        segment (see `HumanGeometry.length`). The meshfiles are relative to `meshdir`. Only the segments `indices` are
+        fitted if given.
+        """
+        for i in range(len(self.segments)) if indices is None else indices:
+            name, segment = self.segment_names[i], self.segments[i]
+            if not (isinstance(segment.meshscale, str) and segment.meshscale == "auto"):
+                continue
+            if not segment.meshfile:
+                raise ValueError(f"Segment {segment.label} has meshscale auto but no meshfile.")
+            # like in the bioMod, meshrt is only applied along with meshxyz
+            rt = parse_vec(segment.meshrt) if segment.meshrt and segment.meshxyz else None
+            with profile("fit_meshes"):
+                extent = mesh_extent(resolve_meshfile(segment.meshfile, meshdir), rt)
+                segment.meshscale = [geometry.length(name) / extent] * 3
+
+    def compute_mesh_inertias(self, meshdir: str = None, replace: bool = False, indices: list[int] = None):
+        """Compute the inertial parameters of the segments with a `meshdensity` from their closed `meshfile`.
+
+        The meshes are placed in the segments by `meshscale`, `meshrt` and `meshxyz`, and are relative to `meshdir`.
+        If `replace`, the mesh's parameters are used and yeadon's become the `alternative_inertia` of the segment,
+        otherwise the mesh's are the `alternative_inertia`, which is written next to the others in the bioMod.
+        Only those of the segments `indices` are computed if given.
+        """
+        for segment in self.segments if indices is None else [self.segments[i] for i in indices]:
+            if segment.meshdensity is None:
+                continue
+            if not segment.meshfile:
+                raise ValueError(f"Segment {segment.label} has a meshdensity but no meshfile.")
+            scale = parse_vec(segment.meshscale) or [1.0, 1.0, 1.0]
+            if segment.meshrt and segment.meshxyz:
+                rotation, translation = rotation_xyz(parse_vec(segment.meshrt)), parse_vec(segment.meshxyz)
+            else:
+                rotation, translation = np.eye(3), [0.0, 0.0, 0.0]
+            path = resolve_meshfile(segment.meshfile, meshdir)
+            with profile("mesh_inertia"):
+                try:
+                    mesh = mesh_inertia(read_stl(path), segment.meshdensity, (scale, rotation, translation))
+                except ValueError as e:
+                    raise ValueError(f"Segment {segment.label}: {path}: {e}")
+            yeadon_inertia = segment.mass, segment.com.copy(), segment.inertia.copy()
+            if replace:
+                segment.mass, segment.com, segment.inertia = mesh
+                segment.alternative_inertia = ("yeadon",) + yeadon_inertia
+            else:
+                segment.alternative_inertia = ("mesh",) + mesh
+
+    def decimate_meshes(self, triangles: int, meshdir: str = None, meshcache: str = None, indices: list[int] = None):
+        """Point the `meshfile` of the segments to copies of their meshes decimated to `triangles` triangles.
+
+        The meshfiles are relative to `meshdir`, and the copies are cached in `meshcache` (`meshdir/decimated` by
+        default) and referred to by their absolute paths. Only the meshes of the segments `indices` are decimated if
+        given.
+        """
+        cache = FileCache(meshcache or os.path.join(meshdir or "", "decimated"), ".stl")
+        for segment in self.segments if indices is None else [self.segments[i] for i in indices]:
+            if segment.meshfile:
+                segment.meshfile = decimated_mesh(resolve_meshfile(segment.meshfile, meshdir), triangles, cache)
+
+    def to_dict(self) -> dict:
+        """Get the model as a JSON serializable dict, with all the numbers as floats."""
+        segments = []
+        for segment in self.segments:
+            segments.append(
+                {
+                    "label": str(segment.label),
+                    "parent": segment.parent and str(segment.parent),
+                    "rt": parse_vec(segment.rt),
+                    "xyz": parse_vec(segment.xyz),
+                    "translations": segment.translations or "",
+                    "rotations": segment.rotations or "",
+                    "rangesQ": [parse_vec(r) for r in segment.rangesQ or []],
+                    "com": parse_vec(segment.com),
+                    "mass": float(segment.mass),
+                    "inertia": [parse_vec(row) for row in segment.inertia],
+                    "mesh": [parse_vec(m) for m in segment.mesh or []],
+                    "meshfile": segment.meshfile,
+                    "meshcolor": parse_vec(segment.meshcolor),
+                    "meshscale": parse_vec(segment.meshscale),
+                    "meshrt": parse_vec(segment.meshrt),
+                    "meshxyz": parse_vec(segment.meshxyz),
+                    "patch": [parse_vec(p) for p in segment.patch or []],
+                    "markers": [
+                        {
+                            "label": str(m.label),
+                            "parent": str(m.parent),
+                            "position": parse_vec(m.position),
+                            "technical": m.technical,
+                            "anatomical": m.anatomical,
+                            "axestoremove": m.axestoremove,
+                        }
+                        for m in segment.markers
+                    ],
+                }
+            )
+            if segment.alternative_inertia:
+                source, mass, com, inertia = segment.alternative_inertia
+                segments[-1]["alternative_inertia"] = {
+                    "source": source,
+                    "mass": float(mass),
+                    "com": parse_vec(com),
+                    "inertia": [parse_vec(row) for row in inertia],
+                }
+
+        return {"version": 4, "gravity": parse_vec(self.gravity), "segments": segments}
+
+    def to_arrays(self) -> dict[str, np.ndarray]:
+        """Get the model's tree, kinematics and inertial parameters as arrays, e.g. to save them in a .npz.
+
+        The S segments have `labels`, `parents` (indices in `labels`, -1 for the root), `translations`, `rotations`,
+        `meshfile`, `rt`, `xyz`, `com` (S, 3), `mass` (S,) and `inertia` (S, 3, 3). The ranges of the degrees of
+        freedom of segment i are `rangesQ[rangesQ_offsets[i]:rangesQ_offsets[i + 1]]`. The M markers have
+        `marker_labels`, `marker_segments` (indices in `labels`) and `marker_positions` (M, 3).
+        """
+        segments = self.segments
+        labels = [str(s.label) for s in segments]
+        markers = [m for s in segments for m in s.markers]
+        ranges = [parse_vec(r) for s in segments for r in s.rangesQ or []]
+        arrays = {
+            "labels": np.array(labels),
+            "parents": np.array([labels.index(str(s.parent)) if s.parent else -1 for s in segments]),
+            "translations": np.array([s.translations or "" for s in segments]),
+            "rotations": np.array([s.rotations or "" for s in segments]),
+            "meshfile": np.array([s.meshfile or "" for s in segments]),
+            "rt": np.array([parse_vec(s.rt) for s in segments]),
+            "xyz": self.parameters[:, 0:3].copy(),
+            "com": self.parameters[:, 3:6].copy(),
+            "mass": self.parameters[:, 6].copy(),
+            "inertia": self.parameters[:, 7:16].reshape(-1, 3, 3).copy(),
+            "rangesQ": np.array(ranges).reshape(-1, 2),
+            "rangesQ_offsets": np.cumsum([0] + [len(s.rangesQ or []) for s in segments]),
+            "marker_labels": np.array([str(m.label) for m in markers], dtype=str),
+            "marker_segments": np.array([labels.index(str(m.parent)) for m in markers], dtype=int),
+            "marker_positions": np.array([parse_vec(m.position) for m in markers]).reshape(-1, 3),
+        }
+        if self.gravity:
+            arrays["gravity"] = np.array(parse_vec(self.gravity))
 
-        mass, com_global, inertia_global = human.combine_inertia(("T", "s3", "s4"))
-        com = np.asarray(com_global - human.P.center_of_mass).reshape(3) - Thorax.get_origin(human)
+        return arrays
 
-        markers = parse_markers(label, markers)
+    def save_json(self, filename: str):
+        with profile("save_json"), open(filename, "w") as f:
+            json.dump(self.to_dict(), f, indent=1)
 
-        BioModSegment.__init__(
-            self,
-            label=label,
-            parent=parent,
-            rt=rt,
-            xyz=xyz,
-            translations=translations,
-            rotations=rotations,
-            com=com,
-            mass=mass,
-            inertia=inertia_global,  # I can do this because the systems of coordinates are aligned.
-            rangesQ=rangesQ,
-            mesh=mesh,
-            meshfile=meshfile,
-            meshcolor=meshcolor,
-            meshscale=meshscale,
-            meshrt=meshrt,
-            meshxyz=meshxyz,
-            patch=patch,
-            markers=markers,
-        )
+    def save_npz(self, filename: str):
+        with profile("save_npz"):
+            np.savez(filename, **self.to_arrays())
 
-    @staticmethod
-    def get_origin(human: yeadon.Human) -> Vec3:
-        """Get the origin of the Thorax in the global frame centered at Pelvis' COM."""
-        return np.asarray(human.T.pos - human.P.center_of_mass).reshape(3)
 
+def _segment_property(name: str) -> property:
+    def segment(model: BioModModel) -> BioModSegment:
+        if name not in model.segment_names:
+            raise AttributeError(f"{type(model).__name__} has no segment {name}.")
+        return model.segments[model.segment_names.index(name)]
 
-class Head(BioModSegment):
-    def __init__(
-        self,
-        human: yeadon.Human,
-        label: str = "",
-        parent: str = Thorax.__name__,
-        rt: Vec3 = O,
-        rotations: str = "",
-        rangesQ: list[Vec2] = None,
-        mesh: list[Vec3] = [(0, 0, 0)],
-        meshfile: str = None,
-        meshcolor: Vec3 = None,
-        meshscale: Vec3 = None,
-        meshrt: Vec3 = None,
-        meshxyz: Vec3 = None,
-        patch: list[Vec3] = None,
-        markers: dict[dict] = {},
-    ):
-        label = label or Head.__name__
+    return property(segment, doc=f"The {name} segment of the model.")
 
-        xyz = Head.get_origin(human) - Thorax.get_origin(human)
-        translations = ""
 
-        mass, com_global, inertia_global = human.combine_inertia(("s5", "s6", "s7"))
-        com = np.asarray(com_global - human.P.center_of_mass).reshape(3) - Head.get_origin(human)
+# the segments used to be attributes of the models, e.g. `model.left_hand` for "LeftHand"
+for _name in SEGMENTS:
+    setattr(BioModModel, "".join(f"_{c}" if c.isupper() else c for c in _name)[1:].lower(), _segment_property(_name))
 
-        markers = parse_markers(label, markers)
 
-        BioModSegment.__init__(
-            self,
-            label=label,
-            parent=parent,
-            rt=rt,
-            xyz=xyz,
-            translations=translations,
-            rotations=rotations,
-            com=com,
-            mass=mass,
-            inertia=inertia_global,  # I can do this because the systems of coordinates are aligned.
-            rangesQ=rangesQ,
-            mesh=mesh,
-            meshfile=meshfile,
-            meshcolor=meshcolor,
-            meshscale=meshscale,
-            meshrt=meshrt,
-            meshxyz=meshxyz,
-            patch=patch,
-            markers=markers,
+class BioModHuman(BioModModel):
+    __slots__ = ()
+
+    segment_names = HUMAN_SEGMENTS
+
+    def iter_lines(self):
+        """Iterate over the lines (without line ending) of the bioMod."""
+        yield "version 4"
+        yield ""
+        yield "root_actuated 0"
+        yield "external_forces 0"
+        yield ""
+        if self.gravity:
+            yield f"gravity {format_vec(self.gravity, self.precision)}"
+            yield ""
+        numbers = self.format_parameters()
+        for i in range(len(self.segments)):
+            if i:
+                yield ""
+            yield from self.segment_lines(i, numbers[i])
+
+
+class BioModHumanFusedLegs(BioModModel):
+    __slots__ = ()
+
+    segment_names = FUSED_LEGS_SEGMENTS
+
+    def iter_lines(self):
+        """Iterate over the lines (without line ending) of the bioMod."""
+        yield "version 4"
+        yield ""
+        yield "root_actuated 0"
+        yield "external_forces 0"
+        yield ""
+        if self.gravity:
+            yield f"gravity {format_vec(self.gravity, self.precision)}"
+            yield ""
+        numbers = self.format_parameters()
+        for i in range(len(self.segments)):
+            yield from self.segment_lines(i, numbers[i])
+            yield ""
+
+
+class BioModGeometry:
+    """Origins and inertial properties of the segments of a `BioModModel`, e.g. read by `read_biomod`.
+
+    Like a `HumanGeometry`, it gives the parameters of the segments to `BioModModel`, to build the same model with
+    other options without the `yeadon.Human`. When yeadon's parameters were replaced by those of a mesh, they are read
+    from the segment's `alternative_inertia`.
+    """
+
+    def __init__(self, model: BioModModel):
+        self.model = model
+        self._segments = dict(zip(model.segment_names, model.segments))
+
+    def parameters(self, segment: str) -> tuple[Vec3, float, Vec3, Mat3x3]:
+        """Get the origin (relative to its parent's), mass, COM (relative to its origin) and inertia of `segment`."""
+        segment = self._segments[segment]
+        if segment.alternative_inertia and segment.alternative_inertia[0] == "yeadon":
+            _, mass, com, inertia = segment.alternative_inertia
+            return segment.xyz, mass, com, inertia
+
+        return segment.xyz, segment.mass, segment.com, segment.inertia
+
+    def length(self, segment: str) -> float:
+        raise ValueError(f"Segment {segment}: meshscale auto needs the yeadon human, not a bioMod.")
+
+
+class _BioModReader:
+    """Parser of the bioMods written by `BioModModel`, reading the tokens of the lines of the bioMod one by one.
+
+    The tokens are split by whitespace, and "/* */" comments are skipped. A "//" comment is a single token, because
+    the `alternative_inertia` of the segments is written in such comments.
+    """
+
+    def __init__(self, lines):
+        self.line = 0
+        self.comments = 0  # number of "//" comments read
+        self.tokens = self.tokenize(lines)
+
+    def tokenize(self, lines):
+        in_comment = False
+        for self.line, line in enumerate(lines, 1):
+            if not in_comment and "/" not in line:
+                yield from line.split()
+                continue
+            while line:
+                if in_comment:
+                    _, end, line = line.partition("*/")
+                    in_comment = not end
+                    continue
+                code, comment, rest = line.partition("//")
+                code, block, after = code.partition("/*")
+                yield from code.split()
+                if block:
+                    in_comment = True
+                    line = after + comment + rest
+                    continue
+                if comment:
+                    self.comments += 1
+                    yield comment + rest.rstrip("\r\n")
+                break
+
+    def error(self, message: str) -> ValueError:
+        return ValueError(f"Line {self.line}: {message}")
+
+    def next(self, comments: bool = False) -> str:
+        """Get the next token (None at the end), skipping the "//" comments unless `comments`."""
+        for token in self.tokens:
+            if comments or not token.startswith("//"):
+                return token
+
+    def take(self, n: int) -> list[str]:
+        """Get the `n` next tokens."""
+        comments = self.comments
+        tokens = list(itertools.islice(self.tokens, n))
+        if self.comments != comments:
+            tokens = [token for token in tokens if not token.startswith("//")]
+            tokens += [self.next() for _ in range(n - len(tokens))]
+        if len(tokens) < n or None in tokens:
+            raise self.error("Unexpected end of the bioMod.")
+
+        return tokens
+
+    def numbers(self, n: int) -> list[float]:
+        """Get the `n` next tokens as floats."""
+        values = []
+        for token in self.take(n):
+            try:
+                values.append(float(token))
+            except ValueError:
+                try:
+                    values.append(parse_number(token))
+                except ValueError as e:
+                    raise self.error(e)
+
+        return values
+
+    def rt(self, keyword: str) -> tuple[list[str], list[str]]:
+        """Get the rotations and translation of `keyword` ("rt" or "meshrt"), written as "rx ry rz xyz tx ty tz"."""
+        tokens = self.take(7)
+        if tokens[3] != "xyz":
+            raise self.error(f"Only {keyword} with the xyz sequence are supported, not {tokens[3]}.")
+
+        return tokens[:3], tokens[4:]
+
+    def read(self) -> tuple[list[BioModSegment], Vec3]:
+        """Get the segments, with their markers, and the gravity of the bioMod."""
+        segments, markers, gravity = [], [], None
+        while (token := self.next()) is not None:
+            if token == "segment":
+                segments.append(self.segment(self.take(1)[0]))
+            elif token == "marker":
+                markers.append(self.marker(self.take(1)[0]))
+            elif token == "gravity":
+                gravity = self.take(3)
+            elif token in ("version", "root_actuated", "external_forces"):
+                self.take(1)
+            else:
+                raise self.error(f"Unsupported keyword {token}.")
+
+        by_label = {segment.label: segment for segment in segments}
+        for marker in markers:
+            if marker.parent not in by_label:
+                raise ValueError(f"Marker {marker.label}: unknown parent {marker.parent}.")
+            by_label[marker.parent].markers.append(marker)
+
+        return segments, gravity
+
+    def segment(self, label: str) -> BioModSegment:
+        options = dict(parent=None, rt=None, xyz=O, translations="", rotations="", rangesQ=None, mesh=None)
+        options.update(meshfile=None, meshcolor=None, meshscale=None, meshrt=None, meshxyz=None, patch=None)
+        com, mass, inertia, alternative = O, 0.0, np.zeros((3, 3)), {}
+        while (token := self.next(comments=True)) != "endsegment":
+            if token is None:
+                raise self.error(f"Segment {label} has no endsegment.")
+            if token.startswith("//"):
+                self.alternative_inertia(token[2:].split(), alternative)
+            elif token in ("parent", "translations", "rotations", "meshfile"):
+                options[token] = self.take(1)[0]
+            elif token == "rt":
+                options["rt"], translation = self.rt(token)
+                options["xyz"] = [float(x) for x in translation]
+            elif token == "rangesQ":
+                dofs = len(options["translations"]) + len(options["rotations"])
+                tokens = self.take(2 * dofs)
+                options["rangesQ"] = [tokens[i : i + 2] for i in range(0, len(tokens), 2)]
+            elif token == "com":
+                com = self.numbers(3)
+            elif token == "mass":
+                mass = self.numbers(1)[0]
+            elif token == "inertia":
+                inertia = np.array(self.numbers(9)).reshape(3, 3)
+            elif token in ("mesh", "patch"):
+                options[token] = (options[token] or []) + [self.take(3)]
+            elif token in ("meshcolor", "meshscale"):
+                options[token] = self.take(3)
+            elif token == "meshrt":
+                options["meshrt"], options["meshxyz"] = self.rt(token)
+            else:
+                raise self.error(f"Segment {label}: unsupported keyword {token}.")
+
+        segment = BioModSegment(label, com=com, mass=mass, inertia=inertia, markers=[], **options)
+        if len(alternative) == 4:
+            segment.alternative_inertia = tuple(alternative[key] for key in ("source", "mass", "com", "inertia"))
+
+        return segment
+
+    def alternative_inertia(self, words: list[str], alternative: dict):
+        """Read the comments "// source com|mass|inertia ..." of an `alternative_inertia` into `alternative`."""
+        if len(words) < 2 or words[1] not in ("com", "mass", "inertia"):
+            return
+        alternative["source"] = words[0]
+        if words[1] == "mass" and len(words) == 3:
+            alternative["mass"] = float(words[2])
+        elif words[1] == "com" and len(words) == 5:
+            alternative["com"] = np.array([float(x) for x in words[2:]])
+        elif words[1] == "inertia":
+            rows = [(self.next(comments=True) or "")[2:].split() for _ in range(3)]
+            alternative["inertia"] = np.array([[float(x) for x in row] for row in rows])
+
+    def marker(self, label: str) -> BioModMarker:
+        options = dict(parent=None, position=None, technical=None, anatomical=None, axestoremove=None)
+        while (token := self.next()) != "endmarker":
+            if token is None:
+                raise self.error(f"Marker {label} has no endmarker.")
+            if token in ("parent", "axestoremove"):
+                options[token] = self.take(1)[0]
+            elif token in ("technical", "anatomical"):
+                value = self.take(1)[0]
+                options[token] = int(value) if value.isdigit() else value
+            elif token == "position":
+                options["position"] = self.take(3)
+            else:
+                raise self.error(f"Marker {label}: unsupported keyword {token}.")
+
+        return BioModMarker(label, **options)
+
+
+def parse_biomod(lines) -> BioModModel:
+    """Get the model of the lines of a bioMod written by biomake (a `BioModHuman` or a `BioModHumanFusedLegs`).
+
+    The options of the segments are kept as the strings of the bioMod, so that the model writes the same bioMod, and
+    the markers are attached to their parent segment. Raises a ValueError if the bioMod is not one of these models.
+    """
+    with profile("parse_biomod"):
+        segments, gravity = _BioModReader(lines).read()
+
+    for Model in (BioModHuman, BioModHumanFusedLegs):
+        if len(segments) != len(Model.segment_names):
+            continue
+        labels = {}
+        for name, segment in zip(Model.segment_names, segments):
+            if segment.parent != labels.get(SEGMENTS[name][0]):
+                break
+            labels[name] = segment.label
+        else:
+            return Model.from_segments(segments, gravity)
+
+    raise ValueError("The segments of the bioMod are not those of BioModHuman nor BioModHumanFusedLegs.")
+
+
+def read_biomod(filename: str, text: str = None) -> BioModModel:
+    """Read the bioMod `filename` written by biomake, see `parse_biomod`, or parse its content `text` if given."""
+    try:
+        if text is not None:
+            return parse_biomod(text.splitlines(keepends=True))
+        with open(filename) as f:
+            return parse_biomod(f)
+    except ValueError as e:
+        raise ValueError(f"{filename}: {e}")
+
+
+# The measurements of a yeadon measurement file, see `yeadon.Human.measnames`.
+MEASUREMENTS = (
+    ("Ls1L", "Ls2L", "Ls3L", "Ls4L", "Ls5L", "Ls6L", "Ls7L", "Ls8L")
+    + ("Ls0p", "Ls1p", "Ls2p", "Ls3p", "Ls5p", "Ls6p", "Ls7p", "Ls0w", "Ls1w", "Ls2w", "Ls3w", "Ls4w", "Ls4d")
+    + ("La2L", "La3L", "La4L", "La5L", "La6L", "La7L")
+    + ("La0p", "La1p", "La2p", "La3p", "La4p", "La5p", "La6p", "La7p", "La4w", "La5w", "La6w", "La7w")
+    + ("Lb2L", "Lb3L", "Lb4L", "Lb5L", "Lb6L", "Lb7L")
+    + ("Lb0p", "Lb1p", "Lb2p", "Lb3p", "Lb4p", "Lb5p", "Lb6p", "Lb7p", "Lb4w", "Lb5w", "Lb6w", "Lb7w")
+    + ("Lj1L", "Lj3L", "Lj4L", "Lj5L", "Lj6L", "Lj8L", "Lj9L")
+    + ("Lj1p", "Lj2p", "Lj3p", "Lj4p", "Lj5p", "Lj6p", "Lj7p", "Lj8p", "Lj9p", "Lj8w", "Lj9w", "Lj6d")
+    + ("Lk1L", "Lk3L", "Lk4L", "Lk5L", "Lk6L", "Lk8L", "Lk9L")
+    + ("Lk1p", "Lk2p", "Lk3p", "Lk4p", "Lk5p", "Lk6p", "Lk7p", "Lk8p", "Lk9p", "Lk8w", "Lk9w", "Lk6d")
+)
+
+# yeadon's default (Dempster) densities in kg/m^3, see `yeadon.Human.segmental_densities`.
+DENSITIES = {
+    "head-neck": 1110,
+    "shoulders": 1040,
+    "thorax": 920,
+    "abdomen-pelvis": 1010,
+    "upper-arm": 1070,
+    "forearm": 1130,
+    "hand": 1160,
+    "thigh": 1050,
+    "lower-leg": 1090,
+    "foot": 1100,
+}
+
+
+def read_measurements(meas: list, symmetric: bool = True) -> tuple[dict[str, np.ndarray], np.ndarray]:
+    """Read the measurement files (or dicts in meters, see `yeadon.Human`) `meas` like `yeadon.Human` does.
+
+    Returns the measurements `{name: (N,)}` in meters, with the limbs averaged if `symmetric`, and the total masses
+    (N,) which are 0 when not given.
+    """
+    values = np.empty((len(meas), len(MEASUREMENTS)))
+    totalmass = np.zeros(len(meas))
+    for i, m in enumerate(meas):
+        if isinstance(m, dict):
+            _check_measurements(m)
+        else:
+            with open(m) as f:
+                m, totalmass[i] = parse_measurements(f.read())
+        values[i] = [m[key] for key in MEASUREMENTS]
+
+    meas = dict(zip(MEASUREMENTS, values.T))
+    if symmetric:
+        average_limbs(meas)
+
+    return meas, totalmass
+
+
+def parse_measurements(text: str) -> tuple[dict[str, float], float]:
+    """Parse the content `text` of a measurement file like `yeadon.Human` does.
+
+    Returns the measurements `{name: value}` in meters, which `yeadon.Human` accepts, and the total mass, which is 0
+    when not given.
+    """
+    with profile("yaml.safe_load"):
+        meas = yaml.safe_load(text)
+    if not isinstance(meas, dict):
+        raise ValueError("A measurement file maps the names of the measurements to their values.")
+    factor = meas.pop("measurementconversionfactor", 0)
+    totalmass = meas.pop("totalmass", 0)
+    if not factor:
+        raise ValueError("Variable measurementconversionfactor not provided or is 0.")
+    _check_measurements(meas)
+
+    return {key: float(val) * factor for key, val in meas.items()}, totalmass
+
+
+def _check_measurements(meas: dict):
+    for key, val in meas.items():
+        if key not in MEASUREMENTS:
+            raise ValueError(f"Variable {key} is not valid name for a measurement.")
+        if val is None or val <= 0:
+            raise ValueError(f"Variable {key} has inappropriate value.")
+    if len(meas) != len(MEASUREMENTS):
+        raise ValueError(f"There should be {len(MEASUREMENTS)} measurements, but {len(meas)} were found.")
+
+
+def average_limbs(meas: dict[str, np.ndarray]):
+    """Average the measurements of the left and right limbs in place, like yeadon's symmetric humans."""
+    for left in MEASUREMENTS:
+        if left[1] in "aj":
+            right = left[0] + {"a": "b", "j": "k"}[left[1]] + left[2:]
+            meas[left] = meas[right] = 0.5 * (meas[left] + meas[right])
+
+
+def _circle(radius: np.ndarray) -> tuple:
+    perimeter = 2.0 * np.pi * radius
+    return radius, np.zeros_like(radius), perimeter / np.pi
+
+
+def _stadium(kind: str, in1: np.ndarray, in2: np.ndarray = None) -> tuple:
+    """Get the (radius, thickness, width) of yeadon's stadia (see `yeadon.solid.Stadium`)."""
+    if kind == "perimeter":
+        return _circle(in1 / (2.0 * np.pi))
+    if kind == "thicknessradius":
+        return in2, in1, 2.0 * in1 + 2.0 * in2
+
+    width = in2
+    perimeter = in1 if kind == "perimwidth" else 2.0 * in2 + (np.pi - 2.0) * in1
+    thickness = (np.pi * width - perimeter) / (2.0 * np.pi - 4.0)
+    radius = (perimeter - 2.0 * width) / (2.0 * np.pi - 4.0)
+    # yeadon turns the invalid stadia into circles
+    fix_radius, fix_thickness, fix_width = _circle(in1 / (2.0 * np.pi) if kind == "perimwidth" else 0.5 * in2)
+    invalid = (radius < 0) | (thickness < 0)
+
+    return (
+        np.where(invalid, fix_radius, radius),
+        np.where(invalid, fix_thickness, thickness),
+        np.where(invalid, fix_width, width),
+    )
+
+
+def _stadium_solid(density: float, height: np.ndarray, stadium0: tuple, stadium1: tuple, ap: bool = False) -> tuple:
+    """Get the mass, COM height and diagonal of the inertia about the COM of yeadon's stadium solids.
+
+    See `yeadon.solid.StadiumSolid`, whose formulae (from Yeadon 1990-ii Appendix 2) and quirks are reproduced.
+    """
+    D, h = density, height
+    degenerate = stadium0[1] == 0
+    r0 = np.where(degenerate, stadium1[0], stadium0[0])
+    t0 = np.where(degenerate, stadium1[1], stadium0[1])
+    r1 = np.where(degenerate, stadium0[0], stadium1[0])
+    t1 = np.where(degenerate, stadium0[1], stadium1[1])
+    a = (r1 - r0) / r0
+    b = np.where(t0 == 0, 1.0, (t1 - t0) / np.where(t0 == 0, 1.0, t0))
+
+    # products instead of powers, which are much slower on arrays
+    def F1(a, b):
+        return 1.0 + (a + b) * 0.5 + a * b / 3.0
+
+    def F2(a, b):
+        return 0.5 + (a + b) / 3.0 + a * b * 0.25
+
+    def F3(a, b):
+        return 1.0 / 3.0 + (a + b) / 4.0 + a * b * 0.2
+
+    def F4(a, b):
+        b2 = b * b
+        return 1.0 + (a + 3.0 * b) * 0.5 + (a * b + b2) + (3.0 * a * b2 + b2 * b) * 0.25 + a * (b2 * b) * 0.2
+
+    def F5(a, b):
+        return 1.0 + (a + b) + (a * a + 4.0 * a * b + b * b) / 3.0 + a * b * (a + b) * 0.5 + (a * a) * (b * b) * 0.2
+
+    r02, t02 = r0 * r0, t0 * t0
+    Faa, Fab, Fba = F4(a, a), F4(a, b), F4(b, a)
+    mass = D * h * r0 * (4.0 * t0 * F1(a, b) + np.pi * r0 * F1(a, a))
+    zcom = D * (h * h) * (4.0 * r0 * t0 * F2(a, b) + np.pi * r02 * F2(a, a)) / mass
+    Iz = D * h * (
+        4.0 * r0 * (t02 * t0) * Fab / 3.0
+        + np.pi * r02 * t02 * F5(a, b)
+        + 4.0 * (r02 * r0) * t0 * Fba
+        + np.pi * (r02 * r02) * Faa * 0.5
+    )
+    Ixy = D * (h * h * h) * (4.0 * r0 * t0 * F3(a, b) + np.pi * r02 * F3(a, a)) - mass * (zcom * zcom)
+    Iy = (
+        D * h * (
+            4.0 * r0 * (t02 * t0) * Fab / 3.0
+            + np.pi * r02 * t02 * F5(a, b)
+            + 8.0 * (r02 * r0) * t0 * Fba / 3.0
+            + np.pi * (r02 * r02) * Faa * 0.25
         )
+        + Ixy
+    )
+    Ix = D * h * (4.0 * r0 * (t02 * t0) * Fab / 3.0 + np.pi * (r02 * r02) * Faa * 0.25) + Ixy
+    # yeadon only flips the COM if the solid is degenerate and its other end is not a circle
+    zcom = np.where(degenerate & (t0 != 0), h - zcom, zcom)
+    if ap:  # the inertia is rotated by pi/2 about z
+        Ix, Iy = Iy, Ix
 
-    @staticmethod
-    def get_origin(human: yeadon.Human) -> Vec3:
-        """Get the origin of the Head in the global frame centered at Pelvis' COM."""
-        length = human.C.solids[0].height + human.C.solids[1].height
-        dir = human.C.end_pos - human.C.pos
-        dir = dir / np.linalg.norm(dir)
-        pos = human.C.pos + length * dir
-        return np.asarray(pos - human.P.center_of_mass).reshape(3)
+    return mass, zcom, np.stack([Ix, Iy, Iz])
 
 
-class LeftUpperArm(BioModSegment):
-    def __init__(
-        self,
-        human: yeadon.Human,
-        label: str = "",
-        parent: str = Thorax.__name__,
-        rt: Vec3 = O,
-        rotations: str = "",
-        rangesQ: list[Vec2] = None,
-        mesh: list[Vec3] = [(0, 0, 0)],
-        meshfile: str = None,
-        meshcolor: Vec3 = None,
-        meshscale: Vec3 = None,
-        meshrt: Vec3 = None,
-        meshxyz: Vec3 = None,
-        patch: list[Vec3] = None,
-        markers: dict[dict] = {},
-    ):
-        label = label or LeftUpperArm.__name__
+def _semiellipsoid(density: float, height: np.ndarray, perimeter: np.ndarray) -> tuple:
+    """Get the mass, COM height and diagonal of the inertia about the COM of yeadon's semiellipsoids."""
+    D, h, r = density, height, perimeter / (2.0 * np.pi)
+    r2, h2 = r * r, h * h
+    mass = D * 2.0 / 3.0 * np.pi * r2 * h
+    Iz = D * 4.0 / 15.0 * np.pi * (r2 * r2) * h
+    Iy = D * np.pi * (2.0 / 15.0 * r2 * h * (r2 + h2) - 3.0 / 32.0 * r2 * (h2 * h))
 
-        xyz = LeftUpperArm.get_origin(human) - Thorax.get_origin(human)
-        translations = ""
+    return mass, 3.0 / 8.0 * h, np.stack([Iy, Iy, Iz])
 
-        com = np.asarray(human.A1.rel_center_of_mass).reshape(3)
-        mass = human.A1.mass
-        inertia = human.A1.rel_inertia
 
-        markers = parse_markers(label, markers)
+class SolidsArrays:
+    """Inertial properties of the `SOLIDS` of N humans, in the global frame of each human.
 
-        BioModSegment.__init__(
-            self,
-            label=label,
-            parent=parent,
-            rt=rt,
-            xyz=xyz,
-            translations=translations,
-            rotations=rotations,
-            com=com,
-            mass=mass,
-            inertia=inertia,
-            rangesQ=rangesQ,
-            mesh=mesh,
-            meshfile=meshfile,
-            meshcolor=meshcolor,
-            meshscale=meshscale,
-            meshrt=meshrt,
-            meshxyz=meshxyz,
-            patch=patch,
-            markers=markers,
-        )
+    `mass` is (N, K), `com` and `proximal` (the center of the end of the solid closest to the pelvis) are (N, K, 3)
+    and `inertia` (about the solid's COM) is (N, K, 3, 3), K being the number of solids.
+    """
+
+    def __init__(self, mass, com, inertia, proximal):
+        self.mass = mass
+        self.com = com
+        self.inertia = inertia
+        self.proximal = proximal
 
     @staticmethod
-    def get_origin(human: yeadon.Human) -> Vec3:
-        """Get the origin of the LeftUpperArm in the global frame centered at Pelvis' COM."""
-        return np.asarray(human.A1.pos - human.P.center_of_mass).reshape(3)
+    def from_humans(humans: list[yeadon.Human]) -> "SolidsArrays":
+        n, k = len(humans), len(SOLIDS)
+        mass = np.empty((n, k))
+        com = np.empty((n, k, 3))
+        inertia = np.empty((n, k, 3, 3))
+        proximal = np.empty((n, k, 3))
+        for i, human in enumerate(humans):
+            solids = [solid for segment in human.segments for solid in segment.solids]
+            for j, solid in enumerate(solids):
+                mass[i, j] = solid.mass
+                com[i, j] = solid.center_of_mass.reshape(3)
+                inertia[i, j] = solid.inertia
+                # the torso is built upward from the pelvis, the limbs downward
+                proximal[i, j] = (solid.pos if SOLIDS[j][0] == "s" else solid.end_pos).reshape(3)
+
+        return SolidsArrays(mass, com, inertia, proximal)
 
+    @staticmethod
+    def from_measurements(meas: dict[str, np.ndarray], totalmass: np.ndarray = None) -> "SolidsArrays":
+        """Compute the solids of N humans in their default configuration from their measurements, without yeadon.
+
+        `meas` and `totalmass` are as returned by `read_measurements`. The closed-form expressions of yeadon's solids
+        are evaluated for all the humans at once.
+        """
+        # solids first, so that each solid is contiguous while it is filled
+        n = len(meas["Ls1L"])
+        mass = np.empty((len(SOLIDS), n))
+        com = np.zeros((len(SOLIDS), 3, n))
+        proximal = np.zeros((len(SOLIDS), 3, n))
+        diagonal = np.empty((len(SOLIDS), 3, n))
+        heights = np.empty((len(SOLIDS), n))
+
+        # torso, built upward from the bottom of the pelvis
+        Ls = [_stadium("perimwidth", meas[f"Ls{i}p"], meas[f"Ls{i}w"]) for i in range(4)]
+        Ls.append(_stadium("depthwidth", meas["Ls4d"], meas["Ls4w"]))
+        radius = 0.57 * Ls[4][0]
+        Ls.append(_stadium("thicknessradius", Ls[4][2] / 2.0 - radius, radius))
+        Ls += [_stadium("perimeter", meas[f"Ls{i}p"]) for i in (5, 6, 7)]
+        torso = [
+            (meas["Ls1L"], "abdomen-pelvis", Ls[0], Ls[1]),
+            (meas["Ls2L"] - meas["Ls1L"], "abdomen-pelvis", Ls[1], Ls[2]),
+            (meas["Ls3L"] - meas["Ls2L"], "thorax", Ls[2], Ls[3]),
+            (meas["Ls4L"] - meas["Ls3L"], "thorax", Ls[3], Ls[4]),
+            (meas["Ls5L"] - meas["Ls4L"], "shoulders", Ls[4], Ls[5]),
+            (meas["Ls6L"], "head-neck", Ls[6], Ls[7]),
+            (meas["Ls7L"] - meas["Ls6L"], "head-neck", Ls[7], Ls[8]),
+        ]
+        for i, (height, density, stadium0, stadium1) in enumerate(torso):
+            heights[i] = height
+            mass[i], com[i, 2], diagonal[i] = _stadium_solid(DENSITIES[density], height, stadium0, stadium1)
+        heights[7] = meas["Ls8L"] - meas["Ls7L"]
+        mass[7], com[7, 2], diagonal[7] = _semiellipsoid(DENSITIES["head-neck"], heights[7], meas["Ls7p"])
+        proximal[1:8, 2] = np.cumsum(heights[:7], axis=0)
+        com[:8, 2] += proximal[:8, 2]
+
+        # limbs, built downward from the shoulders and the hips
+        shoulder_z = proximal[3, 2] + heights[3]
+        hip_x = (Ls[0][1] + Ls[0][0]) / 2.0
+        La = [_stadium("perimeter", meas[f"La{i}p"]) for i in range(4)]
+        La += [_stadium("perimwidth", meas[f"La{i}p"], meas[f"La{i}w"]) for i in range(4, 8)]
+        Lj0 = _stadium("perimeter", 2 * np.pi * 0.5 * np.sqrt(np.abs(Ls[0][0] * Ls[0][2])))
+        limbs = []
+        for side, x in (("a", Ls[4][2] / 2.0), ("b", -Ls[4][2] / 2.0)):
+            L2, L3, L4, L5, L6, L7 = (meas[f"L{side}{i}L"] for i in range(2, 8))
+            heights_arm = (L2 * 0.5, L2 - L2 * 0.5, L3 - L2, L4 - L3, L5, L6 - L5, L7 - L6)
+            densities = ("upper-arm",) * 2 + ("forearm",) * 2 + ("hand",) * 3
+            # yeadon builds both arms with the stadia of the left one
+            limbs.append((side, x, shoulder_z, heights_arm, densities, La))
+        for side, x in (("j", hip_x), ("k", -hip_x)):
+            L1, L3, L4, L5, L6, L8, L9 = (meas[f"L{side}{i}L"] for i in (1, 3, 4, 5, 6, 8, 9))
+            heights_leg = (
+                L1,
+                (L3 + L1) * 0.5 - L1,
+                L3 - (L3 + L1) * 0.5,
+                L4 - L3,
+                L5 - L4,
+                L6,
+                (L8 + L6) * 0.5 - L6,
+                L8 - (L8 + L6) * 0.5,
+                L9 - L8,
+            )
+            densities = ("thigh",) * 3 + ("lower-leg",) * 2 + ("foot",) * 4
+            Lj = [Lj0] + [_stadium("perimeter", meas[f"L{side}{i}p"]) for i in range(1, 6)]
+            Lj.append(_stadium("perimwidth", meas[f"L{side}6p"], meas[f"L{side}6d"]))
+            Lj.append(_stadium("perimeter", meas[f"L{side}7p"]))
+            Lj += [_stadium("perimwidth", meas[f"L{side}{i}p"], meas[f"L{side}{i}w"]) for i in (8, 9)]
+            limbs.append((side, x, 0.0, heights_leg, densities, Lj))
+
+        for side, x, z, limb_heights, densities, stadia in limbs:
+            for i, (height, density) in enumerate(zip(limb_heights, densities)):
+                j = SOLIDS.index(f"{side}{i}")
+                ap = side in "jk" and i in (5, 6)  # the heel's stadium is anteroposterior
+                mass[j], zcom, diagonal[j] = _stadium_solid(DENSITIES[density], height, stadia[i + 1], stadia[i], ap)
+                proximal[j, 0] = com[j, 0] = x
+                proximal[j, 2] = z
+                z = z - height
+                com[j, 2] = z + zcom
+
+        if totalmass is not None:
+            ratio = np.where(totalmass > 0, totalmass / mass.sum(axis=0), 1.0)
+            mass *= ratio
+            diagonal *= ratio
+
+        mass = np.ascontiguousarray(mass.T)
+        com = np.ascontiguousarray(com.transpose(2, 0, 1))
+        proximal = np.ascontiguousarray(proximal.transpose(2, 0, 1))
+        inertia = np.zeros((n, len(SOLIDS), 3, 3))
+        for i in range(3):
+            inertia[:, :, i, i] = diagonal[:, i].T
+
+        return SolidsArrays(mass, com, inertia, proximal)
+
+    def combine(self, solids: tuple[str]) -> tuple:
+        """Get the mass (N,), COM (N, 3) and inertia about the COM (N, 3, 3) of the union of `solids`."""
+        idx = [SOLIDS.index(solid) for solid in solids]
+        m = self.mass[:, idx]
+        mass = m.sum(axis=1)
+        com = np.einsum("nk,nkj->nj", m, self.com[:, idx]) / mass[:, None]
+        # parallel axis theorem
+        d = self.com[:, idx] - com[:, None]
+        transport = np.einsum("nkl,nkl->nk", d, d)[..., None, None] * np.eye(3) - d[..., :, None] * d[..., None, :]
+        inertia = self.inertia[:, idx].sum(axis=1) + np.einsum("nk,nkij->nij", m, transport)
+
+        return mass, com, inertia
+
+
+class Cohort:
+    """Inertial parameters of the segments of N humans as dense arrays.
+
+    `labels` are the S segments (`HUMAN_SEGMENTS` or `FUSED_LEGS_SEGMENTS`) and `parents` the index of their parent
+    in `labels` (-1 for the root). Like in the bioMods, `xyz` (N, S, 3) is the origin of each segment relative to its
+    parent's, `com` (N, S, 3) is relative to the segment's origin and `inertia` (N, S, 3, 3) is about the COM.
+    `mass` is (N, S).
+    """
+
+    def __init__(self, solids: SolidsArrays, fused: bool = False, labels: tuple[str] = None):
+        self.labels = labels or (FUSED_LEGS_SEGMENTS if fused else HUMAN_SEGMENTS)
+        parents = [SEGMENTS[label][0] for label in self.labels]
+        self.parents = np.array([self.labels.index(parent) if parent else -1 for parent in parents])
+
+        # all the segments at once, their solids padded with massless copies of the first one
+        rows = [SEGMENTS[label] for label in self.labels]
+        width = max(len(row[1]) for row in rows)
+        idx = np.array([[SOLIDS.index(solid) for solid in (row[1] + row[1][:1] * width)[:width]] for row in rows])
+        present = np.array([[1.0] * len(row[1]) + [0.0] * (width - len(row[1])) for row in rows])
+
+        m = solids.mass[:, idx] * present  # (N, S, P)
+        self.mass = m.sum(axis=2)
+        com = np.einsum("nsp,nspj->nsj", m, solids.com[:, idx]) / self.mass[..., None]
+        # parallel axis theorem
+        d = solids.com[:, idx] - com[:, :, None]
+        dd = np.einsum("nsp,nspi,nspj->nsij", m, d, d)
+        transport = np.einsum("nsii->ns", dd)[..., None, None] * np.eye(3) - dd
+        self.inertia = np.einsum("sp,nspij->nsij", present, solids.inertia[:, idx]) + transport
+
+        origins = com.copy()
+        for i, (_, _, origin_solids, _, _) in enumerate(rows):
+            if origin_solids:
+                origins[:, i] = solids.proximal[:, [SOLIDS.index(solid) for solid in origin_solids]].mean(axis=1)
+        self.com = com - origins
+        _, pelvis_com, _ = solids.combine(SEGMENTS["Pelvis"][1])
+        origins -= pelvis_com[:, None]
+
+        self.xyz = origins - np.where(self.parents[:, None] >= 0, origins[:, self.parents], 0)
 
-class LeftForearm(BioModSegment):
-    def __init__(
-        self,
-        human: yeadon.Human,
-        label: str = "",
-        parent: str = LeftUpperArm.__name__,
-        rt: Vec3 = O,
-        rotations: str = "",
-        rangesQ: list[Vec2] = None,
-        mesh: list[Vec3] = [(0, 0, 0)],
-        meshfile: str = None,
-        meshcolor: Vec3 = None,
-        meshscale: Vec3 = None,
-        meshrt: Vec3 = None,
-        meshxyz: Vec3 = None,
-        patch: list[Vec3] = None,
-        markers: dict[dict] = {},
-    ):
-        label = label or LeftForearm.__name__
+    @staticmethod
+    def from_meas(meas: list, fused: bool = False, backend: Literal["native", "yeadon"] = "native") -> "Cohort":
+        """Get the cohort of the measurement files (or dicts, see `yeadon.Human`) `meas`.
+
+        The "native" backend computes all the humans at once with `SolidsArrays.from_measurements`, the "yeadon" one
+        builds a `yeadon.Human` for each of them.
+        """
+        if backend == "yeadon":
+            with profile("yeadon.Human"):
+                humans = [_yeadon_human(m) for m in meas]
+            with profile("SolidsArrays.from_humans"):
+                solids = SolidsArrays.from_humans(humans)
+            with profile("Cohort"):
+                return Cohort(solids, fused)
+
+        return Cohort.from_measurements(*read_measurements(meas), fused=fused)
 
-        xyz = LeftForearm.get_origin(human) - LeftUpperArm.get_origin(human)
-        translations = ""
+    @staticmethod
+    def from_measurements(
+        meas: dict[str, np.ndarray], totalmass: np.ndarray = None, fused: bool = False, chunk_size: int = 4096
+    ) -> "Cohort":
+        """Get the cohort of the measurements `meas` and `totalmass` (see `read_measurements`).
+
+        The humans are computed by chunks of `chunk_size` to keep the intermediate solids' arrays small.
+        """
+        n = len(meas["Ls1L"])
+        chunks = []
+        for i in range(0, n, chunk_size):
+            chunk = {name: values[i : i + chunk_size] for name, values in meas.items()}
+            chunk_totalmass = None if totalmass is None else totalmass[i : i + chunk_size]
+            with profile("SolidsArrays.from_measurements"):
+                solids = SolidsArrays.from_measurements(chunk, chunk_totalmass)
+            with profile("Cohort"):
+                chunks.append(Cohort(solids, fused))
+
+        return Cohort.concatenate(chunks)
 
-        # using Segment to have rel_inertia
-        segment = yeadon.segment.Segment("", O.reshape(3, 1), np.eye(3), human.A2.solids[:2], O, False)
-        mass = segment.mass
-        com = np.asarray(segment.rel_center_of_mass).reshape(3)
-        inertia = segment.rel_inertia
+    @staticmethod
+    def concatenate(cohorts: list["Cohort"]) -> "Cohort":
+        """Concatenate the humans of `cohorts`, which must have the same segments."""
+        cohort = copy.copy(cohorts[0])
+        for name in ("mass", "com", "inertia", "xyz"):
+            setattr(cohort, name, np.concatenate([getattr(c, name) for c in cohorts]))
+
+        return cohort
+
+
+def monte_carlo(
+    meas: str,
+    sd: dict[str, float],
+    draws: int,
+    fused: bool = False,
+    seed: int = None,
+    percentiles: tuple[float] = (2.5, 50, 97.5),
+) -> dict[str, np.ndarray]:
+    """Propagate the uncertainty of the measurements of the file `meas` to the segments' parameters.
+
+    `sd` gives the standard deviation of the measurements (and of "totalmass") in the units of `meas`. The `draws`
+    perturbed measurement sets are evaluated at once by `Cohort.from_measurements`. Returns the `labels` and
+    `parents` of the segments and, for "mass", "com", "inertia" and "xyz", the mean (`<name>_mean`), standard
+    deviation (`<name>_std`) and `percentiles` (`<name>_percentiles`) over the draws.
+    """
+    with open(meas) as f:
+        factor = yaml.safe_load(f.read())["measurementconversionfactor"]
+    for name in sd:
+        if name not in MEASUREMENTS and name != "totalmass":
+            raise ValueError(f"Variable {name} is not valid name for a measurement.")
+
+    values, totalmass = read_measurements([meas], symmetric=False)
+    rng = np.random.default_rng(seed)
+    perturbed = {}
+    for name in MEASUREMENTS:
+        perturbed[name] = values[name] + factor * sd.get(name, 0) * rng.standard_normal(draws)
+        # measurements must stay positive
+        perturbed[name] = np.maximum(perturbed[name], np.finfo(float).tiny)
+    average_limbs(perturbed)
+    if totalmass[0] > 0:
+        totalmass = np.maximum(totalmass + sd.get("totalmass", 0) * rng.standard_normal(draws), np.finfo(float).tiny)
+    else:
+        totalmass = None
+
+    cohort = Cohort.from_measurements(perturbed, totalmass, fused)
+
+    results = {
+        "labels": np.array(cohort.labels),
+        "parents": cohort.parents,
+        "draws": np.array(draws),
+        "percentiles": np.array(percentiles),
+    }
+    with profile("statistics"):
+        for name in ("mass", "com", "inertia", "xyz"):
+            values = getattr(cohort, name)
+            results[f"{name}_mean"] = values.mean(axis=0)
+            results[f"{name}_std"] = values.std(axis=0, ddof=1) if draws > 1 else np.zeros(values.shape[1:])
+            results[f"{name}_percentiles"] = np.percentile(values, percentiles, axis=0)
+
+    return results
+
+
+def parse_biomod_options(filename, precision: int = None):
+    """Parse the option file `filename` as the model class, the options of the human and those of the segments.
+
+    `precision`, if given, replaces the `Human: precision:` of the file.
+    """
+    if not filename:
+        return BioModModel, {} if precision is None else {"precision": precision}, {}
 
-        markers = parse_markers(label, markers)
+    with open(filename) as f:
+        return load_biomod_options(f.read(), os.path.dirname(filename), precision)
 
-        BioModSegment.__init__(
-            self,
-            label=label,
-            parent=parent,
-            rt=rt,
-            xyz=xyz,
-            translations=translations,
-            rotations=rotations,
-            com=com,
-            mass=mass,
-            inertia=inertia,
-            rangesQ=rangesQ,
-            mesh=mesh,
-            meshfile=meshfile,
-            meshcolor=meshcolor,
-            meshscale=meshscale,
-            meshrt=meshrt,
-            meshxyz=meshxyz,
-            patch=patch,
-            markers=markers,
-        )
 
-    @staticmethod
-    def get_origin(human: yeadon.Human) -> Vec3:
-        """Get the origin of the LeftForearm in the global frame centered at Pelvis' COM."""
-        return np.asarray(human.A2.pos - human.P.center_of_mass).reshape(3)
+def load_biomod_options(text: str, directory: str = "", precision: int = None):
+    """Parse the content `text` of an option file which is in `directory` (see `parse_biomod_options`)."""
+    Human = BioModModel  # that of the bioMod when rebuilding one, see `BioModModel`
+    human_options = {}
 
+    with profile("yaml.safe_load"):
+        biomod_options = yaml.safe_load(text) or {}
 
-class LeftHand(BioModSegment):
-    def __init__(
-        self,
-        human: yeadon.Human,
-        label: str = "",
-        parent: str = LeftForearm.__name__,
-        rt: Vec3 = O,
-        rotations: str = "",
-        rangesQ: list[Vec2] = None,
-        mesh: list[Vec3] = [(0, 0, 0)],
-        meshfile: str = None,
-        meshcolor: Vec3 = None,
-        meshscale: Vec3 = None,
-        meshrt: Vec3 = None,
-        meshxyz: Vec3 = None,
-        patch: list[Vec3] = None,
-        markers: dict[dict] = {},
-    ):
-        label = label or LeftHand
+    if "Human" in biomod_options:
+        human_options = biomod_options["Human"]
+        del biomod_options["Human"]
+        if "fused" in human_options:
+            Human = BioModHumanFusedLegs if human_options["fused"] else BioModHuman
+            del human_options["fused"]
+    # the meshfiles and the decimated meshes are relative to the option file
+    human_options["meshdir"] = os.path.join(directory, human_options.get("meshdir", ""))
+    if human_options.get("meshcache"):
+        human_options["meshcache"] = os.path.join(directory, human_options["meshcache"])
+    if precision is not None:
+        human_options["precision"] = precision
 
-        xyz = LeftHand.get_origin(human) - LeftForearm.get_origin(human)
-        translations = ""
+    segments_options = biomod_options
 
-        # using Segment to have rel_inertia
-        segment = yeadon.segment.Segment("", O.reshape(3, 1), np.eye(3), human.A2.solids[2:], O, False)
-        mass = segment.mass
-        com = np.asarray(segment.rel_center_of_mass).reshape(3)
-        inertia = segment.rel_inertia
+    # TODO: have segments_options be more defined to be able to clean BioModHuman's __init__
+    return Human, human_options, segments_options
 
-        markers = parse_markers(label, markers)
 
-        BioModSegment.__init__(
-            self,
-            label=label,
-            parent=parent,
-            rt=rt,
-            xyz=xyz,
-            translations=translations,
-            rotations=rotations,
-            com=com,
-            mass=mass,
-            inertia=inertia,
-            rangesQ=rangesQ,
-            mesh=mesh,
-            meshfile=meshfile,
-            meshcolor=meshcolor,
-            meshscale=meshscale,
-            meshrt=meshrt,
-            meshxyz=meshxyz,
-            patch=patch,
-            markers=markers,
-        )
-
-    @staticmethod
-    def get_origin(human: yeadon.Human):
-        """Get the origin of the LeftHand in the global frame centered at Pelvis' COM."""
-        length = human.A2.solids[0].height + human.A2.solids[1].height
-        dir = human.A2.end_pos - human.A2.pos
-        dir = dir / np.linalg.norm(dir)
-        pos = human.A2.pos + length * dir
-        return np.asarray(pos - human.P.center_of_mass).reshape(3)
-
-
-class RightUpperArm(BioModSegment):
-    def __init__(
-        self,
-        human: yeadon.Human,
-        label: str = "",
-        parent: str = Thorax.__name__,
-        rt: Vec3 = O,
-        rotations: str = "",
-        rangesQ: list[Vec2] = None,
-        mesh: list[Vec3] = [(0, 0, 0)],
-        meshfile: str = None,
-        meshcolor: Vec3 = None,
-        meshscale: Vec3 = None,
-        meshrt: Vec3 = None,
-        meshxyz: Vec3 = None,
-        patch: list[Vec3] = None,
-        markers: dict[dict] = {},
-    ):
-        label = label or RightUpperArm.__name__
-
-        xyz = RightUpperArm.get_origin(human) - Thorax.get_origin(human)
-        translations = ""
-        com = np.asarray(human.B1.rel_center_of_mass).reshape(3)
-        mass = human.B1.mass
-        inertia = human.B1.rel_inertia
-
-        markers = parse_markers(label, markers)
-
-        BioModSegment.__init__(
-            self,
-            label=label,
-            parent=parent,
-            rt=rt,
-            xyz=xyz,
-            translations=translations,
-            rotations=rotations,
-            com=com,
-            mass=mass,
-            inertia=inertia,
-            rangesQ=rangesQ,
-            mesh=mesh,
-            meshfile=meshfile,
-            meshcolor=meshcolor,
-            meshscale=meshscale,
-            meshrt=meshrt,
-            meshxyz=meshxyz,
-            patch=patch,
-            markers=markers,
-        )
-
-    @staticmethod
-    def get_origin(human: yeadon.Human) -> Vec3:
-        """Get the origin of the RightUpperArm in the global frame centered at Pelvis' COM."""
-        return np.asarray(human.B1.pos - human.P.center_of_mass).reshape(3)
-
-
-class RightForearm(BioModSegment):
-    def __init__(
-        self,
-        human: yeadon.Human,
-        label: str = "",
-        parent: str = RightUpperArm.__name__,
-        rt: Vec3 = O,
-        rotations: str = "",
-        rangesQ: list[Vec2] = None,
-        mesh: list[Vec3] = [(0, 0, 0)],
-        meshfile: str = None,
-        meshcolor: Vec3 = None,
-        meshscale: Vec3 = None,
-        meshrt: Vec3 = None,
-        meshxyz: Vec3 = None,
-        patch: list[Vec3] = None,
-        markers: dict[dict] = {},
-    ):
-        label = label or RightForearm.__name__
-
-        xyz = RightForearm.get_origin(human) - RightUpperArm.get_origin(human)
-        translations = ""
-
-        # using Segment to have rel_inertia
-        segment = yeadon.segment.Segment("", O.reshape(3, 1), np.eye(3), human.B2.solids[:2], O, False)
-        mass = segment.mass
-        com = np.asarray(segment.rel_center_of_mass).reshape(3)
-        inertia = segment.rel_inertia
-
-        markers = parse_markers(label, markers)
-
-        BioModSegment.__init__(
-            self,
-            label=label,
-            parent=parent,
-            rt=rt,
-            xyz=xyz,
-            translations=translations,
-            rotations=rotations,
-            com=com,
-            mass=mass,
-            inertia=inertia,
-            rangesQ=rangesQ,
-            mesh=mesh,
-            meshfile=meshfile,
-            meshcolor=meshcolor,
-            meshscale=meshscale,
-            meshrt=meshrt,
-            meshxyz=meshxyz,
-            patch=patch,
-            markers=markers,
-        )
-
-    @staticmethod
-    def get_origin(human: yeadon.Human) -> Vec3:
-        """Get the origin of the RightForearm in the global frame centered at Pelvis' COM."""
-        return np.asarray(human.B2.pos - human.P.center_of_mass).reshape(3)
-
-
-class RightHand(BioModSegment):
-    def __init__(
-        self,
-        human: yeadon.Human,
-        label: str = "",
-        parent: str = RightForearm.__name__,
-        rt: Vec3 = O,
-        rotations: str = "",
-        rangesQ: list[Vec2] = None,
-        mesh: list[Vec3] = [(0, 0, 0)],
-        meshfile: str = None,
-        meshcolor: Vec3 = None,
-        meshscale: Vec3 = None,
-        meshrt: Vec3 = None,
-        meshxyz: Vec3 = None,
-        patch: list[Vec3] = None,
-        markers: dict[dict] = {},
-    ):
-        label = label or RightHand.__name__
-
-        xyz = RightHand.get_origin(human) - RightForearm.get_origin(human)
-        translations = ""
-
-        # using Segment to have rel_inertia
-        segment = yeadon.segment.Segment("", O.reshape(3, 1), np.eye(3), human.B2.solids[2:], O, False)
-        mass = segment.mass
-        com = np.asarray(segment.rel_center_of_mass).reshape(3)
-        inertia = segment.rel_inertia
-
-        markers = parse_markers(label, markers)
-
-        BioModSegment.__init__(
-            self,
-            label=label,
-            parent=parent,
-            rt=rt,
-            xyz=xyz,
-            translations=translations,
-            rotations=rotations,
-            com=com,
-            mass=mass,
-            inertia=inertia,
-            rangesQ=rangesQ,
-            mesh=mesh,
-            meshfile=meshfile,
-            meshcolor=meshcolor,
-            meshscale=meshscale,
-            meshrt=meshrt,
-            meshxyz=meshxyz,
-            patch=patch,
-            markers=markers,
-        )
-
-    @staticmethod
-    def get_origin(human: yeadon.Human):
-        """Get the origin of the RightHand in the global frame centered at Pelvis' COM."""
-        length = human.B2.solids[0].height + human.B2.solids[1].height
-        dir = human.B2.end_pos - human.B2.pos
-        dir = dir / np.linalg.norm(dir)
-        pos = human.B2.pos + length * dir
-        return np.asarray(pos - human.P.center_of_mass).reshape(3)
-
-
-class LeftThigh(BioModSegment):
-    def __init__(
-        self,
-        human: yeadon.Human,
-        label: str = "",
-        parent: str = Pelvis.__name__,
-        rt: Vec3 = O,
-        rotations: str = "",
-        rangesQ: list[Vec2] = None,
-        mesh: list[Vec3] = [(0, 0, 0)],
-        meshfile: str = None,
-        meshcolor: Vec3 = None,
-        meshscale: Vec3 = None,
-        meshrt: Vec3 = None,
-        meshxyz: Vec3 = None,
-        patch: list[Vec3] = None,
-        markers: dict[dict] = {},
-    ):
-        label = label or LeftThigh.__name__
-
-        xyz = LeftThigh.get_origin(human) - Pelvis.get_origin(human)
-        translations = ""
-        com = np.asarray(human.J1.rel_center_of_mass).reshape(3)
-        mass = human.J1.mass
-        inertia = human.J1.rel_inertia
-
-        markers = parse_markers(label, markers)
-
-        BioModSegment.__init__(
-            self,
-            label=label,
-            parent=parent,
-            rt=rt,
-            xyz=xyz,
-            translations=translations,
-            rotations=rotations,
-            com=com,
-            mass=mass,
-            inertia=inertia,
-            rangesQ=rangesQ,
-            mesh=mesh,
-            meshfile=meshfile,
-            meshcolor=meshcolor,
-            meshscale=meshscale,
-            meshrt=meshrt,
-            meshxyz=meshxyz,
-            patch=patch,
-            markers=markers,
-        )
-
-    @staticmethod
-    def get_origin(human: yeadon.Human) -> Vec3:
-        """Get the origin of the LeftTigh in the global frame centered at Pelvis' COM."""
-        return np.asarray(human.J1.pos - human.P.center_of_mass).reshape(3)
-
-
-class LeftShank(BioModSegment):
-    def __init__(
-        self,
-        human: yeadon.Human,
-        label: str = "",
-        parent: str = LeftThigh.__name__,
-        rt: Vec3 = O,
-        rotations: str = "",
-        rangesQ: list[Vec2] = None,
-        mesh: list[Vec3] = [(0, 0, 0)],
-        meshfile: str = None,
-        meshcolor: Vec3 = None,
-        meshscale: Vec3 = None,
-        meshrt: Vec3 = None,
-        meshxyz: Vec3 = None,
-        patch: list[Vec3] = None,
-        markers: dict[dict] = {},
-    ):
-        label = label or LeftShank.__name__
-
-        xyz = LeftShank.get_origin(human) - LeftThigh.get_origin(human)
-        translations = ""
-
-        # using Segment to have rel_inertia
-        segment = yeadon.segment.Segment("", O.reshape(3, 1), np.eye(3), human.J2.solids[:2], O, False)
-        mass = segment.mass
-        com = np.asarray(segment.rel_center_of_mass).reshape(3)
-        inertia = segment.rel_inertia
-
-        markers = parse_markers(label, markers)
-
-        BioModSegment.__init__(
-            self,
-            label=label,
-            parent=parent,
-            rt=rt,
-            xyz=xyz,
-            translations=translations,
-            rotations=rotations,
-            com=com,
-            mass=mass,
-            inertia=inertia,
-            rangesQ=rangesQ,
-            mesh=mesh,
-            meshfile=meshfile,
-            meshcolor=meshcolor,
-            meshscale=meshscale,
-            meshrt=meshrt,
-            meshxyz=meshxyz,
-            patch=patch,
-            markers=markers,
-        )
-
-    @staticmethod
-    def get_origin(human: yeadon.Human) -> Vec3:
-        """Get the origin of the LeftShank in the global frame centered at Pelvis' COM."""
-        return np.asarray(human.J2.pos - human.P.center_of_mass).reshape(3)
-
-
-class LeftFoot(BioModSegment):
-    def __init__(
-        self,
-        human: yeadon.Human,
-        label: str = "",
-        parent: str = LeftShank.__name__,
-        rt: Vec3 = O,
-        rotations: str = "",
-        rangesQ: list[Vec2] = None,
-        mesh: list[Vec3] = [(0, 0, 0)],
-        meshfile: str = None,
-        meshcolor: Vec3 = None,
-        meshscale: Vec3 = None,
-        meshrt: Vec3 = None,
-        meshxyz: Vec3 = None,
-        patch: list[Vec3] = None,
-        markers: dict[dict] = {},
-    ):
-        label = label or LeftFoot.__name__
-
-        xyz = LeftFoot.get_origin(human) - LeftShank.get_origin(human)
-        translations = ""
-
-        # using Segment to have rel_inertia
-        segment = yeadon.segment.Segment("", O.reshape(3, 1), np.eye(3), human.J2.solids[2:], O, False)
-        mass = segment.mass
-        com = np.asarray(segment.rel_center_of_mass).reshape(3)
-        inertia = segment.rel_inertia
-
-        markers = parse_markers(label, markers)
-
-        BioModSegment.__init__(
-            self,
-            label=label,
-            parent=parent,
-            rt=rt,
-            xyz=xyz,
-            translations=translations,
-            rotations=rotations,
-            com=com,
-            mass=mass,
-            inertia=inertia,
-            rangesQ=rangesQ,
-            mesh=mesh,
-            meshfile=meshfile,
-            meshcolor=meshcolor,
-            meshscale=meshscale,
-            meshrt=meshrt,
-            meshxyz=meshxyz,
-            patch=patch,
-            markers=markers,
-        )
-
-    @staticmethod
-    def get_origin(human: yeadon.Human):
-        """Get the origin of the LeftFoot in the global frame centered at Pelvis' COM."""
-        length = human.J2.solids[0].height + human.J2.solids[1].height
-        dir = human.J2.end_pos - human.J2.pos
-        dir = dir / np.linalg.norm(dir)
-        pos = human.J2.pos + length * dir
-        return np.asarray(pos - human.P.center_of_mass).reshape(3)
-
-
-class RightThigh(BioModSegment):
-    def __init__(
-        self,
-        human: yeadon.Human,
-        label: str = "",
-        parent: str = Pelvis.__name__,
-        rt: Vec3 = O,
-        rotations: str = "",
-        rangesQ: list[Vec2] = None,
-        mesh: list[Vec3] = [(0, 0, 0)],
-        meshfile: str = None,
-        meshcolor: Vec3 = None,
-        meshscale: Vec3 = None,
-        meshrt: Vec3 = None,
-        meshxyz: Vec3 = None,
-        patch: list[Vec3] = None,
-        markers: dict[dict] = {},
-    ):
-        label = label or RightThigh.__name__
-
-        xyz = RightThigh.get_origin(human) - Pelvis.get_origin(human)
-        translations = ""
-        com = np.asarray(human.K1.rel_center_of_mass).reshape(3)
-        mass = human.K1.mass
-        inertia = human.K1.rel_inertia
-
-        markers = parse_markers(label, markers)
-
-        BioModSegment.__init__(
-            self,
-            label=label,
-            parent=parent,
-            rt=rt,
-            xyz=xyz,
-            translations=translations,
-            rotations=rotations,
-            com=com,
-            mass=mass,
-            inertia=inertia,
-            rangesQ=rangesQ,
-            mesh=mesh,
-            meshfile=meshfile,
-            meshcolor=meshcolor,
-            meshscale=meshscale,
-            meshrt=meshrt,
-            meshxyz=meshxyz,
-            patch=patch,
-            markers=markers,
-        )
-
-    @staticmethod
-    def get_origin(human: yeadon.Human) -> Vec3:
-        """Get the origin of the RightTigh in the global frame centered at Pelvis' COM."""
-        return np.asarray(human.K1.pos - human.P.center_of_mass).reshape(3)
-
-
-class RightShank(BioModSegment):
-    def __init__(
-        self,
-        human: yeadon.Human,
-        label: str = "",
-        parent: str = RightThigh.__name__,
-        rt: Vec3 = O,
-        rotations: str = "",
-        rangesQ: list[Vec2] = None,
-        mesh: list[Vec3] = [(0, 0, 0)],
-        meshfile: str = None,
-        meshcolor: Vec3 = None,
-        meshscale: Vec3 = None,
-        meshrt: Vec3 = None,
-        meshxyz: Vec3 = None,
-        patch: list[Vec3] = None,
-        markers: dict[dict] = {},
-    ):
-        label = label or RightShank.__name__
-
-        xyz = RightShank.get_origin(human) - RightThigh.get_origin(human)
-        translations = ""
+class FileCache:
+    """Directory of files named after a hash of what they were made from.
 
-        # using Segment to have rel_inertia
-        segment = yeadon.segment.Segment("", O.reshape(3, 1), np.eye(3), human.K2.solids[:2], O, False)
-        mass = segment.mass
-        com = np.asarray(segment.rel_center_of_mass).reshape(3)
-        inertia = segment.rel_inertia
+    When the files of the directory exceed `max_size` bytes, the least recently used ones are deleted.
+    """
 
-        markers = parse_markers(label, markers)
-
-        BioModSegment.__init__(
-            self,
-            label=label,
-            parent=parent,
-            rt=rt,
-            xyz=xyz,
-            translations=translations,
-            rotations=rotations,
-            com=com,
-            mass=mass,
-            inertia=inertia,
-            rangesQ=rangesQ,
-            mesh=mesh,
-            meshfile=meshfile,
-            meshcolor=meshcolor,
-            meshscale=meshscale,
-            meshrt=meshrt,
-            meshxyz=meshxyz,
-            patch=patch,
-            markers=markers,
-        )
+    def __init__(self, directory: str, suffix: str, max_size: int = None):
+        self.directory = directory
+        self.suffix = suffix
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._size = None  # of the files, as of the last scan plus the files put since
+        os.makedirs(directory, exist_ok=True)
 
     @staticmethod
-    def get_origin(human: yeadon.Human) -> Vec3:
-        """Get the origin of the RightShank in the global frame centered at Pelvis' COM."""
-        return np.asarray(human.K2.pos - human.P.center_of_mass).reshape(3)
-
-
-class RightFoot(BioModSegment):
-    def __init__(
-        self,
-        human: yeadon.Human,
-        label: str = "",
-        parent: str = RightShank.__name__,
-        rt: Vec3 = O,
-        rotations: str = "",
-        rangesQ: list[Vec2] = None,
-        mesh: list[Vec3] = [(0, 0, 0)],
-        meshfile: str = None,
-        meshcolor: Vec3 = None,
-        meshscale: Vec3 = None,
-        meshrt: Vec3 = None,
-        meshxyz: Vec3 = None,
-        patch: list[Vec3] = None,
-        markers: dict[dict] = {},
-    ):
-        label = label or RightFoot.__name__
-
-        xyz = RightFoot.get_origin(human) - RightShank.get_origin(human)
-        translations = ""
-
-        # using Segment to have rel_inertia
-        segment = yeadon.segment.Segment("", O.reshape(3, 1), np.eye(3), human.K2.solids[2:], O, False)
-        mass = segment.mass
-        com = np.asarray(segment.rel_center_of_mass).reshape(3)
-        inertia = segment.rel_inertia
+    def key(*parts: bytes) -> str:
+        """Hash `parts` into a key."""
+        h = hashlib.sha256()
+        for part in parts:
+            h.update(b"%d:" % len(part))
+            h.update(part)
+
+        return h.hexdigest()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, key + self.suffix)
+
+    def get(self, key: str) -> bytes:
+        """Get the content of the file of `key` or None if it is not cached."""
+        path = self.path(key)
+        try:
+            with profile("cache get"), open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)  # mark as recently used
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return data
+
+    def put(self, key: str, data: bytes):
+        """Cache `data` under `key` and evict the least recently used files if the cache is too big."""
+        with profile("cache put"):
+            import tempfile
+
+            path = self.path(key)
+            fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            if self._size is not None:
+                with contextlib.suppress(FileNotFoundError):
+                    self._size -= os.path.getsize(path)
+                self._size += len(data)
+            os.replace(tmp, path)  # atomic, other processes never see partial files
+
+            if self.max_size is not None and (self._size is None or self._size > self.max_size):
+                self.evict()
+
+    def evict(self):
+        """Scan the directory and, if its files exceed `max_size`, delete the least recently used ones until they fill
+        3/4 of it.
+
+        `put` then only keeps count of its own files, and only scans the directory again once they exceed `max_size`,
+        so that filling a cache costs a linear number of stats. The files of other processes sharing the directory are
+        only counted at the scans.
+        """
+        if self.max_size is None:
+            return
+
+        entries = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.name.endswith(self.suffix):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:  # evicted by another process
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        size = sum(e[1] for e in entries)
+        if size > self.max_size:
+            for _, file_size, path in sorted(entries):
+                if size <= self.max_size * 3 // 4:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                size -= file_size
+        self._size = size
+
+
+def mesh_dependencies(biomod_options: tuple) -> list[str]:
+    """Get the paths of the meshfiles read to build the bioMods of the result of `parse_biomod_options`."""
+    _, human_options, segments_options = biomod_options
+    paths = []
+    for options in segments_options.values():
+        if options.get("meshfile") and (
+            human_options.get("decimate") or options.get("meshscale") == "auto" or "meshdensity" in options
+        ):
+            paths.append(resolve_meshfile(options["meshfile"], human_options.get("meshdir")))
+
+    return paths
+
+
+def biomod_cache_key(meas_data: bytes, biomod_options: tuple) -> str:
+    """Key of the bioMod made from the content of a measurement file and the result of `parse_biomod_options`.
+
+    The meshfiles the bioMod depends on are part of the key through their `file_stamp`.
+    """
+    BioHuman, human_options, segments_options = biomod_options
+    meshes = [file_stamp(path) for path in mesh_dependencies(biomod_options)]
+    # not sorted, the markers are written in the order of the options
+    options = json.dumps([BioHuman.__name__, human_options, segments_options, meshes], default=str)
+
+    return FileCache.key(__version__.encode(), meas_data, options.encode())
+
+
+def _yeadon_human(meas, totalmass: float = 0) -> yeadon.Human:
+    """Build `yeadon.Human(meas)` without changing the humans built after it.
+
+    yeadon scales the densities of its class to the measured mass of each human: the human keeps them and the class gets
+    its own back. yeadon cannot be given the `totalmass` of measurements in a dict (see `parse_measurements`).
+    """
+    densities = copy.deepcopy(yeadon.Human.segmental_densities)
+    try:
+        human = yeadon.Human(meas)
+        if totalmass > 0:
+            human.meas_mass = totalmass
+            human.scale_human_by_mass(totalmass)
+        human.segmental_densities = yeadon.Human.segmental_densities
+    finally:
+        yeadon.Human.segmental_densities = densities
+
+    return human
+
+
+def load_human(meas: str, cache: FileCache = None, data: bytes = None) -> yeadon.Human:
+    """Build the `yeadon.Human` of the measurement file `meas`.
+
+    If `cache` is given, the human is unpickled from it when `meas`' content was already seen, and pickled to it
+    otherwise. Only use caches you trust: unpickling runs arbitrary code.
+    If `meas` is a .bioMod written by biomake, its `BioModGeometry` is returned instead, to rebuild it with other
+    options.
+    `data` is the content of `meas` when it was already read (e.g. received), `meas` is then not read.
+    """
+    if data is None:
+        with open(meas, "rb") as f:
+            data = f.read()
+    if meas.endswith(".bioMod"):
+        return BioModGeometry(read_biomod(meas, data.decode()))
+
+    if cache is None:
+        return _parse_human(data)
+
+    key = FileCache.key(b"yeadon.Human", yeadon.__version__.encode(), data)
+    pickled = cache.get(key)
+    if pickled is not None:
+        with profile("pickle.loads"):
+            return pickle.loads(pickled)
+
+    human = _parse_human(data)
+    with profile("pickle.dumps"):
+        pickled = pickle.dumps(human, pickle.HIGHEST_PROTOCOL)
+    cache.put(key, pickled)
+
+    return human
+
+
+def _parse_human(data: bytes) -> yeadon.Human:
+    meas, totalmass = parse_measurements(data.decode())
+    with profile("yeadon.Human"):
+        return _yeadon_human(meas, totalmass)
+
+
+def cached_biomod(
+    cache: FileCache,
+    meas: str,
+    biomod_options: tuple,
+    human_cache: FileCache = None,
+    model_cache: FileCache = None,
+    data: bytes = None,
+) -> str:
+    """Get the bioMod of `meas` from `cache`, building and caching it if needed.
+
+    `biomod_options` is the result of `parse_biomod_options`. On a miss, the human is loaded through `human_cache`,
+    and the model is rebuilt from the last one of `meas` in `model_cache` if given (see `incremental_biomod`).
+    `data` is the content of `meas`, see `load_human`.
+    """
+    if data is None:
+        with open(meas, "rb") as f:
+            data = f.read()
+    key = biomod_cache_key(data, biomod_options)
+
+    data = cache.get(key)
+    if data is not None:
+        return data.decode()
+
+    if model_cache is not None:
+        biomod = incremental_biomod(model_cache, meas, biomod_options, human_cache, data)
+    else:
+        BioHuman, human_options, segments_options = biomod_options
+        biomod = str(BioHuman(load_human(meas, human_cache, data), **human_options, **segments_options))
+    cache.put(key, biomod.encode())
+
+    return biomod
+
+
+def incremental_biomod(
+    cache: FileCache, meas: str, biomod_options: tuple, human_cache: FileCache = None, data: bytes = None
+) -> str:
+    """Get the bioMod of `meas` with `biomod_options`, only building the segments changed since the last call.
+
+    The last incremental model of each measurement file, model and backend is pickled in `cache`, and the parameters
+    of the segments are read from it (see `BioModGeometry`): the human is only loaded (through `human_cache`) the first
+    time and to fit meshes. Only use caches you trust: unpickling runs arbitrary code.
+    `data` is the content of `meas`, see `load_human`.
+    """
+    BioHuman, human_options, segments_options = biomod_options
+    if data is None:
+        with open(meas, "rb") as f:
+            data = f.read()
+    backend = human_options.get("backend", "yeadon")
+    key = FileCache.key(b"BioModModel", __version__.encode(), data, BioHuman.__name__.encode(), backend.encode())
+
+    pickled = cache.get(key)
+    previous = None
+    if pickled is not None:
+        with profile("pickle.loads"):
+            previous = pickle.loads(pickled)
+    if previous is None or any(options.get("meshscale") == "auto" for options in segments_options.values()):
+        human = load_human(meas, human_cache, data)
+    else:
+        human = BioModGeometry(previous)
+
+    model = BioHuman(human, incremental=True, previous=previous, **human_options, **segments_options)
+    biomod = str(model)
+    with profile("pickle.dumps"):
+        pickled = pickle.dumps(model, pickle.HIGHEST_PROTOCOL)
+    cache.put(key, pickled)
+
+    return biomod
+
+
+# The names of the caches of `open_caches`, in its order, for `report_caches`.
+CACHE_NAMES = ("bioMod cache", "Human cache", "Model cache")
+
+
+def open_caches(cache_dir: str, cache_size: int = None) -> tuple[FileCache, FileCache, FileCache]:
+    """Open the bioMod, the human and the model caches in `cache_dir`, each one of at most `cache_size` bytes."""
+    return (
+        FileCache(cache_dir, ".bioMod", cache_size),
+        FileCache(cache_dir, ".human.pickle", cache_size),
+        FileCache(cache_dir, ".model.pickle", cache_size),
+    )
 
-        markers = parse_markers(label, markers)
 
-        BioModSegment.__init__(
-            self,
-            label=label,
-            parent=parent,
-            rt=rt,
-            xyz=xyz,
-            translations=translations,
-            rotations=rotations,
-            com=com,
-            mass=mass,
-            inertia=inertia,
-            rangesQ=rangesQ,
-            mesh=mesh,
-            meshfile=meshfile,
-            meshcolor=meshcolor,
-            meshscale=meshscale,
-            meshrt=meshrt,
-            meshxyz=meshxyz,
-            patch=patch,
-            markers=markers,
+def report_caches(caches: dict[str, tuple[int, int]]):
+    """Print the `{name: (hits, misses)}` of caches on stderr."""
+    for name, (hits, misses) in caches.items():
+        print(f"{name}: {hits} hits, {misses} misses", file=sys.stderr)
+
+
+def build_biomod(meas: str, biomod_options: str = None, human_cache: FileCache = None, precision: int = None):
+    """Build the bioMod human of the measurement file `meas` with the options in `biomod_options`."""
+    human = load_human(meas, human_cache)
+    BioHuman, human_options, segments_options = parse_biomod_options(biomod_options, precision)
+
+    return BioHuman(human, **human_options, **segments_options)
+
+
+def build_variants(
+    meas: str, variants_options: list, human_cache: FileCache = None, precision: int = None
+) -> Iterator[BioModModel]:
+    """Build the bioMods of the human of the measurement file `meas` with each of `variants_options`, one at a time.
+
+    The variants are option files or results of `parse_biomod_options`, to parse them once for many humans. The human
+    is built once and the inertial parameters of its segments computed once per backend. A variant reuses the
+    segments of the previous variant of the same model and backend whose options are the same, along with their texts
+    (see `BioModModel`), so the models share these segments. The texts are those written before the next variant is
+    built: write each model as it is yielded to write the reused segments only once.
+    """
+    human = load_human(meas, human_cache)
+    geometries = {}
+    previous = {}
+    for options in variants_options:
+        if options is None or isinstance(options, str):
+            options = parse_biomod_options(options, precision)
+        BioHuman, human_options, segments_options = options
+        if precision is not None:
+            human_options = {**human_options, "precision": precision}
+        backend = human_options.get("backend", "yeadon")
+        if isinstance(human, BioModGeometry):
+            geometry = human
+        else:
+            if backend not in geometries:
+                geometries[backend] = HumanGeometry(human, backend)
+            geometry = geometries[backend]
+        model = BioHuman(
+            geometry, incremental=True, previous=previous.get((BioHuman, backend)), **human_options, **segments_options
         )
+        previous[BioHuman, backend] = model
+        yield model
+
+
+def _watch_stamps(paths) -> dict[str, tuple]:
+    stamps = {}
+    for path in paths:
+        try:
+            stamps[path] = file_stamp(path)
+        except OSError:  # being replaced by an editor, or deleted
+            stamps[path] = None
+
+    return stamps
+
+
+def watch(
+    meas: str,
+    biomod_options: str = None,
+    output: str = None,
+    json_output: str = None,
+    npz_output: str = None,
+    interval: float = 0.2,
+    debounce: float = 0.1,
+    precision: int = None,
+):
+    """Write the bioMod of `meas` to `output`, and write it again whenever `meas`, the option file `biomod_options` or
+    the meshes read to build it change, until interrupted.
+
+    The files are polled every `interval` seconds, and a change is only handled once the files were left unchanged
+    for `debounce` seconds, as editors save files in several steps. The human is only rebuilt when `meas` changes, and
+    only the segments whose options or meshes changed are built again (see `BioModModel`). The model is also exported
+    to `json_output` and `npz_output` if given. The outputs are only written when the bioMod changed. The latency of
+    each rebuild and the errors are printed on stderr. `precision` replaces that of the option file.
+    """
+    human = model = options = biomod = None
+    stamps = {}
+    changed = None  # the first build
+    while True:
+        if changed == []:
+            time.sleep(interval)
+            current = _watch_stamps(stamps)
+            changed = [path for path in stamps if current[path] != stamps[path]]
+            while changed:  # until the files are left alone
+                time.sleep(debounce)
+                latest = _watch_stamps(stamps)
+                if latest == current:
+                    break
+                current = latest
+            continue
+
+        start = time.perf_counter()
+        stamps = _watch_stamps([meas] + ([biomod_options] if biomod_options else []))
+        try:
+            if human is None or meas in changed:
+                human = model = None  # builds fail until the measurements are fixed
+                human = load_human(meas)
+            if options is None or biomod_options in changed:
+                options = None
+                options = parse_biomod_options(biomod_options, precision)
+            BioHuman, human_options, segments_options = options
+            stamps.update(_watch_stamps(mesh_dependencies(options)))
+            model = BioHuman(human, incremental=True, previous=model, **human_options, **segments_options)
+            built = model.texts.count(None)
+            text = str(model)
+            if text != biomod:
+                with open(output, "w") as f:
+                    f.write(text)
+                if json_output:
+                    model.save_json(json_output)
+                if npz_output:
+                    model.save_npz(npz_output)
+                biomod = text
+            latency = (time.perf_counter() - start) * 1000
+            cause = f" ({', '.join(changed)} changed)" if changed else ""
+            n = len(model.segments)
+            print(f"{output}: {built}/{n} segments rebuilt in {latency:.1f} ms{cause}", file=sys.stderr)
+        except Exception as e:  # keep watching, the files can be fixed
+            print(f"{output}: {e}", file=sys.stderr)
+        changed = []
+
+
+_batch_options = None
+_batch_caches = None
+
+
+_batch_exports = ()
+_batch_profile = False
+
+
+def _init_batch_worker(biomod_options, cache_dir, cache_size, exports, profile):
+    global _batch_options, _batch_caches, _batch_exports, _batch_profile
+    _batch_options = biomod_options
+    _batch_caches = open_caches(cache_dir, cache_size) if cache_dir else None
+    _batch_exports = exports
+    _batch_profile = profile
+
+
+def save_exports(biohuman: BioModModel, output: str, exports: tuple[str]):
+    """Save the "json" and/or "npz" `exports` of `biohuman` next to its bioMod `output`."""
+    root = os.path.splitext(output)[0]
+    if "json" in exports:
+        biohuman.save_json(root + ".json")
+    if "npz" in exports:
+        biohuman.save_npz(root + ".npz")
+
+
+def _batch_task(meas: str, output: str):
+    if not _batch_profile:
+        return _batch_convert(meas, output) + (None,)
+
+    with Profiler() as profiler:
+        elapsed, counts = _batch_convert(meas, output)
+
+    return elapsed, counts, profiler.report()
+
+
+def _batch_convert(meas: str, output: str):
+    start = time.perf_counter()
+    biomod, biohuman, counts = _batch_build(meas)
+    with open(output, "w") as f:
+        f.write(biomod)
+    if _batch_exports:
+        save_exports(biohuman, output, _batch_exports)
+
+    return time.perf_counter() - start, counts
+
+
+def _batch_build(meas: str, data: bytes = None) -> tuple[str, BioModModel, list[tuple[int, int]]]:
+    """Build the bioMod of the measurement file `meas` with the options of the batch worker.
+
+    `data` is the content of `meas`, see `load_human`. Returns the bioMod, its model (None when the bioMod was cached)
+    and the `(hits, misses)` of the caches.
+    """
+    if _batch_exports:  # the models are needed, not only their bioMods
+        BioHuman, human_options, segments_options = _batch_options
+        human_cache = _batch_caches[1] if _batch_caches else None
+        before = (human_cache.hits, human_cache.misses) if human_cache else None
+        biohuman = BioHuman(load_human(meas, human_cache, data), **human_options, **segments_options)
+        counts = [(0, 0), (human_cache.hits - before[0], human_cache.misses - before[1])] if human_cache else []
+        return str(biohuman), biohuman, counts
+
+    if _batch_caches:
+        before = [(c.hits, c.misses) for c in _batch_caches]
+        biomod = cached_biomod(_batch_caches[0], meas, _batch_options, *_batch_caches[1:], data)
+        return biomod, None, [(c.hits - h, c.misses - m) for c, (h, m) in zip(_batch_caches, before)]
+
+    BioHuman, human_options, segments_options = _batch_options
+    biohuman = BioHuman(load_human(meas, data=data), **human_options, **segments_options)
+    return str(biohuman), biohuman, []
+
+
+def _pipeline_task(meas: str, data: bytes):
+    """Build the bioMod of the content `data` of the measurement file (or bioMod) `meas` for `batch_pipeline`.
+
+    Returns the bioMod, the `{extension: data}` of its exports, the counts of the caches and the profile report (if
+    profiling).
+    """
+    with Profiler() if _batch_profile else contextlib.nullcontext() as profiler:
+        biomod, biohuman, counts = _batch_build(meas, data)
+
+        exported = {}
+        if "json" in _batch_exports:
+            with profile("save_json"):
+                exported[".json"] = json.dumps(biohuman.to_dict(), indent=1).encode()
+        if "npz" in _batch_exports:
+            import io
+
+            with profile("save_npz"):
+                buffer = io.BytesIO()
+                np.savez(buffer, **biohuman.to_arrays())
+                exported[".npz"] = buffer.getvalue()
+
+    return biomod, exported, counts, profiler.report() if profiler else None
+
+
+def batch(
+    meas_files: list[str],
+    output_dir: str,
+    biomod_options: str = None,
+    jobs: int = None,
+    cache_dir: str = None,
+    cache_size: int = None,
+    exports: tuple[str] = (),
+    precision: int = None,
+):
+    """Convert every file of `meas_files` to a bioMod in `output_dir` using a pool of `jobs` processes.
+
+    The bioMod of `path/to/Human.txt` is written to `output_dir/Human.bioMod`, and its `exports` ("json" and/or
+    "npz", see `BioModModel`) to `output_dir/Human.json` and `output_dir/Human.npz`.
+    If `cache_dir` is given, the bioMods and the humans are cached there (see `open_caches`). Only the humans are
+    when there are `exports`.
+    If a `Profiler` is active, the timings of the workers are added to it.
+    `precision` replaces that of the option file (see `parse_biomod_options`).
+    Returns the list of `(meas, error)` of the failed conversions.
+    """
+    outputs = batch_outputs(meas_files, output_dir)
+    biomod_options = parse_biomod_options(biomod_options, precision)
+
+    failed = []
+    caches = {name: [0, 0] for name in CACHE_NAMES}
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    profiler = _profiler
+    start = time.perf_counter()
+    with ProcessPoolExecutor(
+        jobs,
+        initializer=_init_batch_worker,
+        initargs=(biomod_options, cache_dir, cache_size, tuple(exports), profiler is not None),
+    ) as executor:
+        futures = {executor.submit(_batch_task, m, o): m for m, o in zip(meas_files, outputs)}
+        for future in as_completed(futures):
+            try:
+                _, counts, report = future.result()
+            except Exception as e:
+                failed.append((futures[future], e))
+                print(f"{futures[future]}: {e}", file=sys.stderr)
+                continue
+            if report is not None:
+                profiler.merge(report)
+            for total, (hits, misses) in zip(caches.values(), counts):
+                total[0] += hits
+                total[1] += misses
+    elapsed = time.perf_counter() - start
+
+    report_batch(len(meas_files) - len(failed), len(meas_files), elapsed, jobs)
+    if cache_dir:
+        report_caches(caches)
+
+    return failed
+
+
+def batch_outputs(meas_files: list[str], output_dir: str) -> list[str]:
+    """Get the bioMods of `batch` for `meas_files`, creating `output_dir` if needed."""
+    outputs = [os.path.join(output_dir, os.path.splitext(os.path.basename(m))[0] + ".bioMod") for m in meas_files]
+    if len(set(outputs)) != len(outputs):
+        raise ValueError("Some files share the same name, their bioMods would overwrite each other.")
+    os.makedirs(output_dir, exist_ok=True)
+
+    return outputs
+
+
+def report_batch(done: int, total: int, elapsed: float, jobs: int = None):
+    """Print the throughput of a batch conversion on stderr."""
+    print(
+        f"Converted {done}/{total} models in {elapsed:.3f} s "
+        f"({done / elapsed if elapsed else 0:.1f} models/s, {jobs or os.cpu_count()} workers)",
+        file=sys.stderr,
+    )
 
-    @staticmethod
-    def get_origin(human: yeadon.Human):
-        """Get the origin of the RightFoot in the global frame centered at Pelvis' COM."""
-        length = human.K2.solids[0].height + human.K2.solids[1].height
-        dir = human.K2.end_pos - human.K2.pos
-        dir = dir / np.linalg.norm(dir)
-        pos = human.K2.pos + length * dir
-        return np.asarray(pos - human.P.center_of_mass).reshape(3)
-
-
-class Thighs(BioModSegment):
-    """The tighs of a human if they must remain together."""
-
-    def __init__(
-        self,
-        human: yeadon.Human,
-        label: str = "",
-        parent: str = Pelvis.__name__,
-        rt: Vec3 = O,
-        rotations: str = "",
-        rangesQ: list[Vec2] = None,
-        mesh: list[Vec3] = [(0, 0, 0)],
-        meshfile: str = None,
-        meshcolor: Vec3 = None,
-        meshscale: Vec3 = None,
-        meshrt: Vec3 = None,
-        meshxyz: Vec3 = None,
-        patch: list[Vec3] = None,
-        markers: dict[dict] = {},
-    ):
-        label = label or Thighs.__name__
-        xyz = Thighs.get_origin(human) - Pelvis.get_origin(human)
-        translations = ""
-
-        mass, com_global, inertia = human.combine_inertia(("J1", "K1"))
-        com = np.asarray(com_global - human.P.center_of_mass).reshape(3) - Thighs.get_origin(human)
-
-        markers = parse_markers(label, markers)
 
-        BioModSegment.__init__(
+def _read_text(path: str) -> str:
+    with open(path) as f:
+        return f.read()
+
+
+def _read_bytes(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _write_outputs(output: str, biomod: str, exported: dict[str, bytes]):
+    with open(output, "w") as f:
+        f.write(biomod)
+    root = os.path.splitext(output)[0]
+    for extension, data in exported.items():
+        with open(root + extension, "wb") as f:
+            f.write(data)
+
+
+async def batch_pipeline(
+    meas_files: list[str],
+    output_dir: str,
+    biomod_options: str = None,
+    jobs: int = None,
+    cache_dir: str = None,
+    cache_size: int = None,
+    exports: tuple[str] = (),
+    queue_size: int = None,
+    io_jobs: int = 8,
+    precision: int = None,
+):
+    """Do what `batch` does, reading the measurement files and writing the bioMods while others are built.
+
+    The files are read and written by `io_jobs` threads, so that the latency of slow (e.g. network) storage overlaps
+    with the construction of the models by the pool of `jobs` processes. At most `queue_size` (twice the number of
+    workers by default) measurements wait for a worker, and as many bioMods for being written: when a stage is slower,
+    the previous one waits instead of holding every file in memory.
+    Returns the list of `(meas, error)` of the failed conversions.
+    """
+    import asyncio
+    from concurrent.futures import ProcessPoolExecutor
+
+    outputs = batch_outputs(meas_files, output_dir)
+    if biomod_options:
+        options = await asyncio.to_thread(_read_text, biomod_options)
+        biomod_options = load_biomod_options(options, os.path.dirname(biomod_options), precision)
+    else:
+        biomod_options = parse_biomod_options(None, precision)
+    jobs = jobs or os.cpu_count()
+    to_build = asyncio.Queue(queue_size or 2 * jobs)
+    to_write = asyncio.Queue(queue_size or 2 * jobs)
+    tasks = iter(zip(meas_files, outputs))
+
+    failed = []
+    caches = {name: [0, 0] for name in CACHE_NAMES}
+
+    def fail(meas: str, error: Exception):
+        failed.append((meas, error))
+        print(f"{meas}: {error}", file=sys.stderr)
+
+    async def read():
+        for meas, output in tasks:  # shared by the readers
+            try:
+                data = await asyncio.to_thread(_read_bytes, meas)
+            except Exception as e:
+                fail(meas, e)
+                continue
+            await to_build.put((meas, output, data))
+
+    async def build():
+        while (task := await to_build.get()) is not None:
+            meas, output, data = task
+            try:
+                result = await loop.run_in_executor(executor, _pipeline_task, meas, data)
+            except Exception as e:
+                fail(meas, e)
+                continue
+            await to_write.put((meas, output, result))
+
+    async def write():
+        while (task := await to_write.get()) is not None:
+            meas, output, (biomod, exported, counts, report) = task
+            try:
+                await asyncio.to_thread(_write_outputs, output, biomod, exported)
+            except Exception as e:
+                fail(meas, e)
+                continue
+            if report is not None:
+                profiler.merge(report)
+            for total, (hits, misses) in zip(caches.values(), counts):
+                total[0] += hits
+                total[1] += misses
+
+    loop = asyncio.get_running_loop()
+    profiler = _profiler
+    start = time.perf_counter()
+    with ProcessPoolExecutor(
+        jobs,
+        initializer=_init_batch_worker,
+        initargs=(biomod_options, cache_dir, cache_size, tuple(exports), profiler is not None),
+    ) as executor:
+        builders = [asyncio.create_task(build()) for _ in range(jobs)]
+        writers = [asyncio.create_task(write()) for _ in range(io_jobs)]
+        await asyncio.gather(*(read() for _ in range(io_jobs)))
+        for _ in builders:
+            await to_build.put(None)
+        await asyncio.gather(*builders)
+        for _ in writers:
+            await to_write.put(None)
+        await asyncio.gather(*writers)
+    elapsed = time.perf_counter() - start
+
+    report_batch(len(meas_files) - len(failed), len(meas_files), elapsed, jobs)
+    if cache_dir:
+        report_caches(caches)
+
+    return failed
+
+
+_server_caches = None
+
+
+def _init_server_worker(cache_dir, cache_size):
+    global _server_caches
+    _server_caches = open_caches(cache_dir, cache_size) if cache_dir else None
+
+
+def _serve_biomod(meas: str, options: str = None, options_dir: str = "", name: str = "meas.txt") -> str:
+    biomod_options = load_biomod_options(options, options_dir) if options else parse_biomod_options(None)
+    # the name of the client's file tells bioMods apart, see `load_human`
+    if _server_caches:
+        return cached_biomod(_server_caches[0], name, biomod_options, *_server_caches[1:], meas.encode())
+    BioHuman, human_options, segments_options = biomod_options
+    return str(BioHuman(load_human(name, data=meas.encode()), **human_options, **segments_options))
+
+
+@functools.cache
+def _server_class() -> type:
+    """Define `BioModServer`, whose bases are only imported (with http.server) when serving."""
+    from concurrent.futures import ProcessPoolExecutor
+    from concurrent.futures.process import BrokenProcessPool
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class _BioModRequestHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            if self.path != "/biomod":
+                return self.reply(404, "Unknown path, use /biomod.")
+            try:
+                request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                args = request["meas"], request.get("options"), request.get("options_dir", "")
+                args += (os.path.basename(request.get("name", "meas.txt")),)
+            except (ValueError, KeyError, TypeError):
+                return self.reply(
+                    400, 'Expected a JSON object with "meas" and optionally "name", "options" and "options_dir".'
+                )
+
+            if not self.server.slots.acquire(blocking=False):
+                return self.reply(503, "Too many requests, try again later.")
+            executor = self.server.executor
+            try:
+                biomod = executor.submit(_serve_biomod, *args).result()
+            except (ValueError, yaml.YAMLError) as e:  # the files of the client
+                return self.reply(400, str(e))
+            except BrokenProcessPool as e:  # e.g. a worker was killed
+                self.server.restart_executor(executor)
+                return self.reply(500, str(e))
+            except Exception as e:
+                return self.reply(500, f"{type(e).__name__}: {e}")
+            finally:
+                self.server.slots.release()
+
+            self.reply(200, biomod)
+
+        def reply(self, status: int, text: str):
+            data = text.encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "text/plain; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    class BioModServer(ThreadingHTTPServer):
+        """HTTP server building the bioMods of the measurements and options POSTed as JSON to /biomod.
+
+        The bioMods are built by a pool of `jobs` processes which keep everything imported. At most `queue_size`
+        requests wait for a worker, the others are answered 503. If `cache_dir` is given, the workers use the caches
+        of `open_caches`.
+        The clients choose the directory of the meshes read and written (e.g. decimated) with the rights of the
+        server, so the `address` must be a loopback one: only the users of the machine can request bioMods.
+        """
+
+        daemon_threads = True
+
+        def __init__(
             self,
-            label=label,
-            parent=parent,
-            rt=rt,
-            xyz=xyz,
-            translations=translations,
-            rotations=rotations,
-            com=com,
-            mass=mass,
-            inertia=inertia,  # I can do this because the systems of coordinates are aligned.
-            rangesQ=rangesQ,
-            mesh=mesh,
-            meshfile=meshfile,
-            meshcolor=meshcolor,
-            meshscale=meshscale,
-            meshrt=meshrt,
-            meshxyz=meshxyz,
-            patch=patch,
-            markers=markers,
-        )
-
-    @staticmethod
-    def get_origin(human: yeadon.Human) -> Vec3:
-        """Get the origin of the Tighs in the global frame centered at Pelvis' COM."""
-        return np.asarray(human.P.pos - human.P.center_of_mass).reshape(3)
-
-
-class Shanks(BioModSegment):
-    """The shanks of a human if they must remain together."""
-
-    def __init__(
-        self,
-        human: yeadon.Human,
-        label: str = "",
-        parent: str = Thighs.__name__,
-        rt: Vec3 = O,
-        rotations: str = "",
-        rangesQ: list[Vec2] = None,
-        mesh: list[Vec3] = [(0, 0, 0)],
-        meshfile: str = None,
-        meshcolor: Vec3 = None,
-        meshscale: Vec3 = None,
-        meshrt: Vec3 = None,
-        meshxyz: Vec3 = None,
-        patch: list[Vec3] = None,
-        markers: dict[dict] = {},
-    ):
-        label = label or Shanks.__name__
-        xyz = Shanks.get_origin(human) - Thighs.get_origin(human)
-        translations = ""
-
-        mass, com_global, inertia = human.combine_inertia(("j3", "j4", "k3", "k4"))
-        com = np.asarray(com_global - human.P.center_of_mass).reshape(3) - Shanks.get_origin(human)
-
-        markers = parse_markers(label, markers)
+            address: tuple[str, int],
+            jobs: int = None,
+            queue_size: int = 64,
+            cache_dir: str = None,
+            cache_size: int = None,
+        ):
+            super().__init__(address, _BioModRequestHandler)
+            import ipaddress
+
+            if not ipaddress.ip_address(self.server_address[0]).is_loopback:
+                super().server_close()
+                raise ValueError(f"{address[0]} is not a loopback address, the server must only serve its machine.")
+            self.jobs = jobs
+            self.caches = (cache_dir, cache_size)
+            self.executor = ProcessPoolExecutor(jobs, initializer=_init_server_worker, initargs=self.caches)
+            self.executor_lock = threading.Lock()
+            self.slots = threading.BoundedSemaphore((jobs or os.cpu_count()) + queue_size)
+
+        def restart_executor(self, broken: ProcessPoolExecutor):
+            """Replace the pool of workers `broken` once one of them died, unless another request already did."""
+            with self.executor_lock:
+                if self.executor is broken:
+                    broken.shutdown(wait=False)
+                    self.executor = ProcessPoolExecutor(
+                        self.jobs, initializer=_init_server_worker, initargs=self.caches
+                    )
+
+        def server_close(self):
+            super().server_close()
+            self.executor.shutdown()
+
+    return BioModServer
+
+
+def __getattr__(name):
+    # module attributes defined on first use
+    if name == "BioModServer":
+        return _server_class()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def request_biomod(meas: str, biomod_options: str = None, address: tuple[str, int] = ("127.0.0.1", 8765)) -> str:
+    """Get the bioMod of the measurement file (or bioMod) `meas` with the option file `biomod_options` from a
+    `BioModServer`.
+
+    Raises a ValueError if the server could not build the bioMod and a ConnectionError if it did not handle the
+    request.
+    """
+    request = {"meas": None, "name": os.path.basename(meas), "options": None, "options_dir": ""}
+    with open(meas) as f:
+        request["meas"] = f.read()
+    if biomod_options:
+        with open(biomod_options) as f:
+            request["options"] = f.read()
+        request["options_dir"] = os.path.abspath(os.path.dirname(biomod_options))
+
+    import http.client
+
+    connection = http.client.HTTPConnection(*address)
+    try:
+        connection.request("POST", "/biomod", json.dumps(request), {"Content-Type": "application/json"})
+        response = connection.getresponse()
+        text = response.read().decode()
+    finally:
+        connection.close()
+
+    if response.status == 400:
+        raise ValueError(text)
+    if response.status != 200:
+        raise ConnectionError(f"{response.status} {response.reason}: {text}")
+
+    return text
+
+
+def parse_address(address: str) -> tuple[str, int]:
+    """Get the `(host, port)` of "host:port" or "port"."""
+    host, _, port = address.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+def expand_globs(patterns: list[str]):
+    """Expand the glob patterns the shell did not, keeping the paths that match nothing as is."""
+    paths = []
+    for pattern in patterns:
+        paths += sorted(glob.glob(pattern)) or [pattern]
+
+    return paths
+
+
+def add_cache_arguments(parser):
+    parser.add_argument(
+        "--cache", metavar="DIR", help="directory where to cache the generated bioMods, yeadon humans and models"
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=float,
+        default=100,
+        metavar="MB",
+        help="size of each of the bioMod, human and model caches (default: %(default)s MB each)",
+    )
 
-        BioModSegment.__init__(
-            self,
-            label=label,
-            parent=parent,
-            rt=rt,
-            xyz=xyz,
-            translations=translations,
-            rotations=rotations,
-            com=com,
-            mass=mass,
-            inertia=inertia,  # I can do this because the systems of coordinates are aligned.
-            rangesQ=rangesQ,
-            mesh=mesh,
-            meshfile=meshfile,
-            meshcolor=meshcolor,
-            meshscale=meshscale,
-            meshrt=meshrt,
-            meshxyz=meshxyz,
-            patch=patch,
-            markers=markers,
-        )
 
-    @staticmethod
-    def get_origin(human: yeadon.Human) -> Vec3:
-        """Get the origin of the ShanksAndFeet in the global frame centered at Pelvis' COM."""
-        return np.asarray((human.J2.pos + human.K2.pos) / 2.0 - human.P.center_of_mass).reshape(3)
+def add_precision_argument(parser):
+    parser.add_argument(
+        "--precision",
+        type=int,
+        metavar="DECIMALS",
+        help="round the numbers of the bioMods to DECIMALS decimals (default: Human: precision: of the options, "
+        "or the shortest repr of each float)",
+    )
 
 
-class Feet(BioModSegment):
-    """The shanks and feet of a human if they must remain together."""
+def print_biomod(biohuman: BioModModel):
+    """Stream the bioMod of `biohuman` to stdout, ending with an empty line like `print(biohuman)` does."""
+    biohuman.write(sys.stdout)
+    print()
 
-    def __init__(
-        self,
-        human: yeadon.Human,
-        label: str = "",
-        parent: str = Shanks.__name__,
-        rt: Vec3 = O,
-        rotations: str = "",
-        rangesQ: list[Vec2] = None,
-        mesh: list[Vec3] = [(0, 0, 0)],
-        meshfile: str = None,
-        meshcolor: Vec3 = None,
-        meshscale: Vec3 = None,
-        meshrt: Vec3 = None,
-        meshxyz: Vec3 = None,
-        patch: list[Vec3] = None,
-        markers: dict[dict] = {},
-    ):
-        label = label or Feet.__name__
 
-        xyz = Feet.get_origin(human) - Shanks.get_origin(human)
-        translations = ""
+def add_profile_argument(parser):
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="-",
+        metavar="FILE",
+        help="write the wall time of each phase and segment as JSON to FILE (default: stderr)",
+    )
 
-        mass, com_global, inertia = human.combine_inertia(("j5", "j6", "j7", "j8", "k5", "k6", "k7", "k8"))
-        com = np.asarray(com_global - human.P.center_of_mass).reshape(3) - Feet.get_origin(human)
 
-        markers = parse_markers(label, markers)
+def main(argv: list[str] = None):
+    import argparse
 
-        BioModSegment.__init__(
-            self,
-            label=label,
-            parent=parent,
-            rt=rt,
-            xyz=xyz,
-            translations=translations,
-            rotations=rotations,
-            com=com,
-            mass=mass,
-            inertia=inertia,  # I can do this because the systems of coordinates are aligned.
-            rangesQ=rangesQ,
-            mesh=mesh,
-            meshfile=meshfile,
-            meshcolor=meshcolor,
-            meshscale=meshscale,
-            meshrt=meshrt,
-            meshxyz=meshxyz,
-            patch=patch,
-            markers=markers,
-        )
+    argv = sys.argv[1:] if argv is None else argv
 
-    @staticmethod
-    def get_origin(human: yeadon.Human) -> Vec3:
-        """Get the origin of the Feet in the global frame centered at Pelvis' COM."""
-        length = (
-            human.J2.solids[0].height
-            + human.J2.solids[1].height
-            + human.K2.solids[0].height
-            + human.K2.solids[1].height
-        ) / 2.0
-        dir_J = human.K2.end_pos - human.K2.pos
-        dir_K = human.K2.end_pos - human.K2.pos
-        dir = (dir_J + dir_K) / 2.0
-        dir = dir / np.linalg.norm(dir)
-        pos = (human.J2.pos + human.K2.pos) / 2.0 + length * dir
-        return np.asarray(pos - human.P.center_of_mass).reshape(3)
-
-
-class BioModHuman:
-    def __init__(self, human: yeadon.Human, gravity: Vec3 = None, **segments_options):
-        self.gravity = gravity
-        self.pelvis = Pelvis(human, **segments_options[Pelvis.__name__] if Pelvis.__name__ in segments_options else {})
-        self.thorax = Thorax(
-            human,
-            parent=self.pelvis.label,
-            **segments_options[Thorax.__name__] if Thorax.__name__ in segments_options else {},
-        )
-        self.head = Head(
-            human,
-            parent=self.thorax.label,
-            **segments_options[Head.__name__] if Head.__name__ in segments_options else {},
-        )
-        self.right_upper_arm = RightUpperArm(
-            human,
-            parent=self.thorax.label,
-            **segments_options[RightUpperArm.__name__] if RightUpperArm.__name__ in segments_options else {},
-        )
-        self.right_forearm = RightForearm(
-            human,
-            parent=self.right_upper_arm.label,
-            **segments_options[RightForearm.__name__] if RightForearm.__name__ in segments_options else {},
-        )
-        self.right_hand = RightHand(
-            human,
-            parent=self.right_forearm.label,
-            **segments_options[RightHand.__name__] if RightHand.__name__ in segments_options else {},
-        )
-        self.left_upper_arm = LeftUpperArm(
-            human,
-            parent=self.thorax.label,
-            **segments_options[LeftUpperArm.__name__] if LeftUpperArm.__name__ in segments_options else {},
+    if argv[:1] == ["batch"]:
+        parser = argparse.ArgumentParser(
+            prog="biomake.py batch", description="Convert many yeadon human models to bioMods."
         )
-        self.left_forearm = LeftForearm(
-            human,
-            parent=self.left_upper_arm.label,
-            **segments_options[LeftForearm.__name__] if LeftForearm.__name__ in segments_options else {},
+        parser.add_argument(
+            "meas", nargs="+", help="measurement files (or glob patterns) of the humans, or bioMods to rebuild"
         )
-        self.left_hand = LeftHand(
-            human,
-            parent=self.left_forearm.label,
-            **segments_options[LeftHand.__name__] if LeftHand.__name__ in segments_options else {},
+        parser.add_argument("--bioModOptions", nargs=1, help="option file for the bioMods")
+        parser.add_argument("-o", "--output", required=True, help="directory where to write the bioMods")
+        parser.add_argument("-j", "--jobs", type=int, help="number of worker processes (default: number of CPUs)")
+        parser.add_argument(
+            "--export",
+            nargs="+",
+            choices=("json", "npz"),
+            default=(),
+            help="also export the models as structured data next to their bioMods",
         )
-        self.right_thigh = RightThigh(
-            human,
-            parent=self.pelvis.label,
-            **segments_options[RightThigh.__name__] if RightThigh.__name__ in segments_options else {},
+        parser.add_argument(
+            "--pipeline",
+            action="store_true",
+            help="read and write the files while the models are built, for slow (e.g. network) storage",
         )
-        self.right_shank = RightShank(
-            human,
-            parent=self.right_thigh.label,
-            **segments_options[RightShank.__name__] if RightShank.__name__ in segments_options else {},
+        parser.add_argument(
+            "--queue",
+            type=int,
+            help="with --pipeline, number of files waiting for a worker or for being written (default: 2 * jobs)",
         )
-        self.right_foot = RightFoot(
-            human,
-            parent=self.right_shank.label,
-            **segments_options[RightFoot.__name__] if RightFoot.__name__ in segments_options else {},
+        parser.add_argument(
+            "--io-jobs",
+            type=int,
+            default=8,
+            help="with --pipeline, number of files read or written at once (default: %(default)s)",
         )
-        self.left_thigh = LeftThigh(
-            human,
-            parent=self.pelvis.label,
-            **segments_options[LeftThigh.__name__] if LeftThigh.__name__ in segments_options else {},
+        add_precision_argument(parser)
+        add_cache_arguments(parser)
+        add_profile_argument(parser)
+        args = parser.parse_args(argv[1:])
+
+        bioModOptions = args.bioModOptions[0] if args.bioModOptions else None
+        batch_args = (
+            expand_globs(args.meas),
+            args.output,
+            bioModOptions,
+            args.jobs,
+            args.cache,
+            args.cache_size * 2**20,
+            args.export,
         )
-        self.left_shank = LeftShank(
-            human,
-            parent=self.left_thigh.label,
-            **segments_options[LeftShank.__name__] if LeftShank.__name__ in segments_options else {},
+        try:
+            with profiling(args.profile):
+                if args.pipeline:
+                    import asyncio
+
+                    failed = asyncio.run(batch_pipeline(*batch_args, args.queue, args.io_jobs, args.precision))
+                else:
+                    failed = batch(*batch_args, args.precision)
+        except (ValueError, OSError) as e:
+            parser.error(str(e))
+
+        return 1 if failed else 0
+
+    if argv[:1] == ["variants"]:
+        parser = argparse.ArgumentParser(
+            prog="biomake.py variants", description="Convert a yeadon human model to bioMods with many option files."
         )
-        self.left_foot = LeftFoot(
-            human,
-            parent=self.left_shank.label,
-            **segments_options[LeftFoot.__name__] if LeftFoot.__name__ in segments_options else {},
+        parser.add_argument("meas", help="measurement file of the human, or bioMod made by biomake to rebuild")
+        parser.add_argument("bioModOptions", nargs="+", help="option files (or glob patterns) of the variants")
+        parser.add_argument(
+            "-o", "--output", required=True, help="directory where to write the bioMods, named after the option files"
         )
-
-    def __str__(self):
-        biomod = "version 4\n\nroot_actuated 0\nexternal_forces 0\n\n"
-        if self.gravity:
-            biomod += f"gravity {format_vec(self.gravity)}\n\n"
-        biomod += f"{self.pelvis}\n\n"
-        biomod += f"{self.thorax}\n\n"
-        biomod += f"{self.head}\n\n"
-        biomod += f"{self.right_upper_arm}\n\n"
-        biomod += f"{self.right_forearm}\n\n"
-        biomod += f"{self.right_hand}\n\n"
-        biomod += f"{self.left_upper_arm}\n\n"
-        biomod += f"{self.left_forearm}\n\n"
-        biomod += f"{self.left_hand}\n\n"
-        biomod += f"{self.right_thigh}\n\n"
-        biomod += f"{self.right_shank}\n\n"
-        biomod += f"{self.right_foot}\n\n"
-        biomod += f"{self.left_thigh}\n\n"
-        biomod += f"{self.left_shank}\n\n"
-        biomod += f"{self.left_foot}\n"
-
-        return biomod
-
-
-class BioModHumanFusedLegs:
-    def __init__(self, human: yeadon.Human, gravity: Vec3 = None, **segments_options):
-        self.gravity = gravity
-        self.pelvis = Pelvis(human, **segments_options[Pelvis.__name__] if Pelvis.__name__ in segments_options else {})
-        self.thorax = Thorax(
-            human,
-            parent=self.pelvis.label,
-            **segments_options[Thorax.__name__] if Thorax.__name__ in segments_options else {},
+        parser.add_argument(
+            "--export",
+            nargs="+",
+            choices=("json", "npz"),
+            default=(),
+            help="also export the models as structured data next to their bioMods",
         )
-        self.head = Head(
-            human,
-            parent=self.thorax.label,
-            **segments_options[Head.__name__] if Head.__name__ in segments_options else {},
+        add_precision_argument(parser)
+        add_profile_argument(parser)
+        args = parser.parse_args(argv[1:])
+
+        option_files = expand_globs(args.bioModOptions)
+        try:
+            with profiling(args.profile):
+                outputs = batch_outputs(option_files, args.output)
+                start = time.perf_counter()
+                # each model is written before the next one reuses its segments' texts
+                for model, output in zip(build_variants(args.meas, option_files, precision=args.precision), outputs):
+                    with open(output, "w") as f:
+                        f.write(str(model))
+                    save_exports(model, output, args.export)
+                elapsed = time.perf_counter() - start
+        except (ValueError, OSError) as e:
+            parser.error(str(e))
+        print(f"Built {len(outputs)} variants in {elapsed:.3f} s", file=sys.stderr)
+
+        return 0
+
+    if argv[:1] == ["serve"]:
+        parser = argparse.ArgumentParser(
+            prog="biomake.py serve", description="Serve bioMods over HTTP, see `biomake.py client`."
         )
-        self.right_upper_arm = RightUpperArm(
-            human,
-            parent=self.thorax.label,
-            **segments_options[RightUpperArm.__name__] if RightUpperArm.__name__ in segments_options else {},
+        parser.add_argument(
+            "--address", default="127.0.0.1:8765", help="host:port to listen to (default: %(default)s)"
         )
-        self.right_forearm = RightForearm(
-            human,
-            parent=self.right_upper_arm.label,
-            **segments_options[RightForearm.__name__] if RightForearm.__name__ in segments_options else {},
+        parser.add_argument("-j", "--jobs", type=int, help="number of worker processes (default: number of CPUs)")
+        parser.add_argument(
+            "--queue", type=int, default=64, help="number of requests waiting for a worker (default: %(default)s)"
         )
-        self.right_hand = RightHand(
-            human,
-            parent=self.right_forearm.label,
-            **segments_options[RightHand.__name__] if RightHand.__name__ in segments_options else {},
+        add_cache_arguments(parser)
+        args = parser.parse_args(argv[1:])
+
+        try:
+            server = _server_class()(
+                parse_address(args.address), args.jobs, args.queue, args.cache, args.cache_size * 2**20
+            )
+        except (ValueError, OSError) as e:
+            parser.error(str(e))
+        with server:
+            print(f"Serving bioMods on http://{args.address}/biomod", file=sys.stderr)
+            try:
+                server.serve_forever()
+            except KeyboardInterrupt:
+                pass
+
+        return 0
+
+    if argv[:1] == ["client"]:
+        parser = argparse.ArgumentParser(
+            prog="biomake.py client", description="Convert yeadon human model to bioMod with `biomake.py serve`."
         )
-        self.left_upper_arm = LeftUpperArm(
-            human,
-            parent=self.thorax.label,
-            **segments_options[LeftUpperArm.__name__] if LeftUpperArm.__name__ in segments_options else {},
+        parser.add_argument(
+            "meas", help="measurement file of the human, or bioMod made by biomake to rebuild with other options"
         )
-        self.left_forearm = LeftForearm(
-            human,
-            parent=self.left_upper_arm.label,
-            **segments_options[LeftForearm.__name__] if LeftForearm.__name__ in segments_options else {},
+        parser.add_argument("--bioModOptions", nargs=1, help="option file for the bioMod")
+        parser.add_argument(
+            "--address", default="127.0.0.1:8765", help="host:port of the server (default: %(default)s)"
         )
-        self.left_hand = LeftHand(
-            human,
-            parent=self.left_forearm.label,
-            **segments_options[LeftHand.__name__] if LeftHand.__name__ in segments_options else {},
+        args = parser.parse_args(argv[1:])
+
+        try:
+            biomod = request_biomod(
+                args.meas, args.bioModOptions[0] if args.bioModOptions else None, parse_address(args.address)
+            )
+        except (ValueError, OSError) as e:
+            print(e, file=sys.stderr)
+            return 1
+        print(biomod)
+
+        return 0
+
+    if argv[:1] == ["montecarlo"]:
+        parser = argparse.ArgumentParser(
+            prog="biomake.py montecarlo",
+            description="Propagate the uncertainty of the measurements to the segments' inertial parameters.",
         )
-        self.thighs = Thighs(
-            human,
-            parent=self.pelvis.label,
-            **segments_options[Thighs.__name__] if Thighs.__name__ in segments_options else {},
+        parser.add_argument("meas", help="measurement file of the human")
+        parser.add_argument(
+            "--sd",
+            help="YAML file of the standard deviation of each measurement (and totalmass) in the units of meas",
         )
-        self.shanks = Shanks(
-            human,
-            parent=self.thighs.label,
-            **segments_options[Shanks.__name__] if Shanks.__name__ in segments_options else {},
+        parser.add_argument(
+            "--relative-sd",
+            type=float,
+            default=0,
+            help="standard deviation of the measurements missing from --sd, relative to their values",
         )
-        self.feet = Feet(
-            human,
-            parent=self.shanks.label,
-            **segments_options[Feet.__name__] if Feet.__name__ in segments_options else {},
-        )
-
-    def __str__(self):
-        biomod = "version 4\n\nroot_actuated 0\nexternal_forces 0\n\n"
-        if self.gravity:
-            biomod += f"gravity {format_vec(self.gravity)}\n\n"
-        biomod += f"{self.pelvis}\n\n"
-        biomod += f"{self.thorax}\n\n"
-        biomod += f"{self.head}\n\n"
-        biomod += f"{self.right_upper_arm}\n\n"
-        biomod += f"{self.right_forearm}\n\n"
-        biomod += f"{self.right_hand}\n\n"
-        biomod += f"{self.left_upper_arm}\n\n"
-        biomod += f"{self.left_forearm}\n\n"
-        biomod += f"{self.left_hand}\n\n"
-        biomod += f"{self.thighs}\n\n"
-        biomod += f"{self.shanks}\n\n"
-        biomod += f"{self.feet}\n\n"
-
-        return biomod
-
-
-def parse_biomod_options(filename):
-    Human = BioModHuman
-    human_options = {}
-    segments_options = {}
-
-    if not filename:
-        return Human, human_options, segments_options
-
-    with open(filename) as f:
-        biomod_options = yaml.safe_load(f.read())
-
-    if "Human" in biomod_options:
-        human_options = biomod_options["Human"]
-        del biomod_options["Human"]
-        if "fused" in human_options:
-            if human_options["fused"]:
-                Human = BioModHumanFusedLegs
-            del human_options["fused"]
+        parser.add_argument("-n", "--draws", type=int, default=10000, help="number of draws (default: %(default)s)")
+        parser.add_argument("--seed", type=int, help="seed of the random draws")
+        parser.add_argument("--bioModOptions", nargs=1, help="option file for the bioMod, for its segments")
+        parser.add_argument("-o", "--output", required=True, help="the .npz where to write the distributions")
+        add_profile_argument(parser)
+        args = parser.parse_args(argv[1:])
+
+        with profiling(args.profile):
+            sd = {}
+            if args.sd:
+                with open(args.sd) as f:
+                    sd = yaml.safe_load(f.read()) or {}
+            if args.relative_sd:
+                with open(args.meas) as f:
+                    raw = yaml.safe_load(f.read())
+                for name in MEASUREMENTS:
+                    sd.setdefault(name, args.relative_sd * raw[name])
+
+            BioHuman, _, _ = parse_biomod_options(args.bioModOptions[0] if args.bioModOptions else None)
+            try:
+                results = monte_carlo(args.meas, sd, args.draws, BioHuman is BioModHumanFusedLegs, args.seed)
+            except ValueError as e:
+                parser.error(str(e))
+            with profile("np.savez_compressed"):
+                np.savez_compressed(args.output, **results)
+
+        return 0
+
+    parser = argparse.ArgumentParser(
+        description="Convert yeadon human model to bioMod.",
+        epilog="Use `%(prog)s batch --help` to convert many models at once, "
+        "`%(prog)s variants --help` to build a model with many option files, "
+        "`%(prog)s montecarlo --help` to propagate measurement uncertainty, "
+        "`%(prog)s serve --help` and `%(prog)s client --help` to keep biomake running between conversions.",
+    )
+    parser.add_argument(
+        "meas", help="measurement file of the human, or bioMod made by biomake to rebuild with other options"
+    )
+    parser.add_argument("--bioModOptions", nargs=1, help="option file for the bioMod")
+    parser.add_argument("--json", help="also export the model as JSON to this file")
+    parser.add_argument("--npz", help="also export the model's arrays as .npz to this file")
+    parser.add_argument(
+        "--watch",
+        metavar="OUTPUT",
+        help="write the bioMod to OUTPUT (and the exports) and again each time meas, the options or meshes change",
+    )
+    add_precision_argument(parser)
+    add_cache_arguments(parser)
+    add_profile_argument(parser)
+    args = parser.parse_args(argv)
 
-    segments_options = biomod_options
+    bioModOptions = args.bioModOptions[0] if args.bioModOptions else None
 
-    # TODO: have segments_options be more defined to be able to clean BioModHuman's __init__
-    return Human, human_options, segments_options
+    if args.watch:
+        try:
+            watch(args.meas, bioModOptions, args.watch, args.json, args.npz, precision=args.precision)
+        except KeyboardInterrupt:
+            pass
+        return 0
 
+    with profiling(args.profile):
+        if args.json or args.npz:  # the model is needed, not only its bioMod
+            human_cache = open_caches(args.cache, args.cache_size * 2**20)[1] if args.cache else None
+            biohuman = build_biomod(args.meas, bioModOptions, human_cache, args.precision)
+            print_biomod(biohuman)
+            if args.json:
+                biohuman.save_json(args.json)
+            if args.npz:
+                biohuman.save_npz(args.npz)
+            return 0
 
-if __name__ == "__main__":
-    import argparse
+        if args.cache:
+            caches = open_caches(args.cache, args.cache_size * 2**20)
+            biomod_options = parse_biomod_options(bioModOptions, args.precision)
+            biomod = cached_biomod(caches[0], args.meas, biomod_options, *caches[1:])
+            print(biomod)
+            report_caches({name: (c.hits, c.misses) for name, c in zip(CACHE_NAMES, caches)})
+            return 0
 
-    parser = argparse.ArgumentParser(description="Convert yeadon human model to bioMod.")
-    parser.add_argument("meas", help="measurement file of the human")
-    parser.add_argument("--bioModOptions", nargs=1, help="option file for the bioMod")
-    args = parser.parse_args()
+        biohuman = build_biomod(args.meas, bioModOptions, precision=args.precision)
 
-    bioModOptions = args.bioModOptions[0] if args.bioModOptions else None
+        print_biomod(biohuman)
 
-    human = yeadon.Human(args.meas)
-    BioHuman, human_options, segments_options = parse_biomod_options(bioModOptions)
+    return 0
 
-    biohuman = BioHuman(human, **human_options, **segments_options)
 
-    print(biohuman)
+if __name__ == "__main__":
+    sys.exit(main())
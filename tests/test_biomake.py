@@ -0,0 +1,288 @@
+import asyncio
+import os
+import subprocess
+import sys
+import threading
+
+import numpy as np
+import pytest
+import yaml
+
+import biomake
+
+EXAMPLE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "example")
+TETRAHEDRON = np.array([[0, 0, 0], [1, 0, 0], [0, 1, 0], [0, 0, 1]], dtype=np.float32)
+TETRAHEDRON_FACES = np.array([[0, 2, 1], [0, 1, 3], [0, 3, 2], [1, 2, 3]])
+
+
+def test_decimate_degenerate_triangle():
+    degenerate = np.array([[[0, 0, 0], [0, 0, 0], [1, 0, 0]]], dtype=np.float32)
+    mesh = biomake.StlMesh(np.concatenate([TETRAHEDRON[TETRAHEDRON_FACES], degenerate]))
+
+    decimated = biomake.decimate(mesh, 4)
+
+    assert len(decimated) == 4
+
+
+def test_decimate_duplicated_triangles():
+    mesh = biomake.StlMesh(TETRAHEDRON[np.concatenate([TETRAHEDRON_FACES, TETRAHEDRON_FACES[:2]])])
+
+    decimated = biomake.decimate(mesh, 5)
+
+    assert len(decimated) == 4
+    assert len(biomake.decimate(mesh, 3)) <= 3
+
+
+def test_watch_keeps_failing_until_the_measurements_are_fixed(tmp_path, monkeypatch, capsys):
+    with open(os.path.join(EXAMPLE, "female1.txt")) as f:
+        female1 = f.read()
+    meas, options, output = tmp_path / "a.txt", tmp_path / "a.yml", tmp_path / "a.bioMod"
+    meas.write_text(female1)
+    options.write_text("Human:\n  precision: 6\n")
+    expected = str(biomake.build_biomod(str(meas), str(options)))
+    edits = iter(
+        [
+            lambda: meas.write_text(female1.replace("Ls1L: 13.4", "Ls1L: -5")),
+            lambda: options.write_text("Human:\n  precision: 5\n"),
+        ]
+    )
+
+    def sleep(seconds):
+        if seconds == 0.2:  # the polling interval, the debounce is 0.1 s
+            edit = next(edits, None)
+            if edit is None:
+                raise KeyboardInterrupt
+            edit()
+
+    monkeypatch.setattr(biomake.time, "sleep", sleep)
+    with pytest.raises(KeyboardInterrupt):
+        biomake.watch(str(meas), str(options), str(output))
+
+    messages = capsys.readouterr().err.splitlines()
+    assert len(messages) == 3
+    assert "segments rebuilt" in messages[0]
+    assert "segments rebuilt" not in messages[1]
+    assert "segments rebuilt" not in messages[2]
+    assert output.read_text() == expected
+
+
+def test_batch_equals_single_runs(tmp_path):
+    with open(os.path.join(EXAMPLE, "female1.txt")) as f:
+        lines = f.readlines()
+    # yeadon scales the densities to the total mass, the human without one must not get those of the previous one
+    (tmp_path / "a.txt").write_text("".join(lines).replace("totalmass: 49.4", "totalmass: 70"))
+    (tmp_path / "b.txt").write_text("".join(line for line in lines if not line.startswith("totalmass")))
+    meas_files = [str(tmp_path / "a.txt"), str(tmp_path / "b.txt")]
+
+    failed = biomake.batch(meas_files, str(tmp_path / "out"), jobs=1)
+
+    assert not failed
+    for meas in meas_files:
+        name = os.path.splitext(os.path.basename(meas))[0]
+        single = subprocess.run([sys.executable, biomake.__file__, meas], capture_output=True, text=True, check=True)
+        # print_biomod ends with an empty line
+        assert (tmp_path / "out" / f"{name}.bioMod").read_text() + "\n" == single.stdout
+
+
+@pytest.mark.parametrize("pipeline", [False, True])
+def test_batch_undecodable_files(tmp_path, pipeline):
+    meas_files = [os.path.join(EXAMPLE, "female1.txt"), str(tmp_path / "a.txt"), str(tmp_path / "b.txt")]
+    for meas in meas_files[1:]:
+        with open(meas, "wb") as f:
+            f.write(bytes(range(128, 256)))
+
+    if pipeline:
+        failed = asyncio.run(biomake.batch_pipeline(meas_files, str(tmp_path / "out"), jobs=1))
+    else:
+        failed = biomake.batch(meas_files, str(tmp_path / "out"), jobs=1)
+
+    assert sorted(meas for meas, _ in failed) == meas_files[1:]
+    assert (tmp_path / "out" / "female1.bioMod").exists()
+
+
+def test_pipeline_equals_batch(tmp_path):
+    meas_files = [os.path.join(EXAMPLE, "female1.txt"), os.path.join(EXAMPLE, "female1_opt.bioMod")]
+    options = os.path.join(EXAMPLE, "female1_opt.yml")
+
+    failed = biomake.batch(meas_files, str(tmp_path / "batch"), options, jobs=1)
+    failed += asyncio.run(
+        biomake.batch_pipeline(meas_files, str(tmp_path / "pipeline"), options, jobs=1, cache_dir=str(tmp_path))
+    )
+
+    assert not failed
+    for name in ("female1", "female1_opt"):
+        batch, pipeline = (tmp_path / mode / f"{name}.bioMod" for mode in ("batch", "pipeline"))
+        assert pipeline.read_text() == batch.read_text()
+
+
+def test_segment_attributes():
+    human = biomake.load_human(os.path.join(EXAMPLE, "female1.txt"))
+    model = biomake.BioModHumanFusedLegs(human)
+
+    assert model.pelvis is model.segments[0]
+    assert model.left_hand.label == "LeftHand"
+    assert model.feet is model.segments[-1]
+    assert not hasattr(model, "left_foot")
+
+
+@pytest.mark.filterwarnings("ignore:Stadium")  # yeadon warns about the stadia it fixes
+def test_native_solids_equal_yeadon(tmp_path):
+    with open(os.path.join(EXAMPLE, "female1.txt")) as f:
+        female1 = yaml.safe_load(f.read())
+    rng = np.random.default_rng(0)
+    meas_files = [os.path.join(EXAMPLE, "female1.txt")]
+    for i in range(8):
+        scale = rng.uniform(0.85, 1.15)
+        subject = {key: float(val * scale * rng.uniform(0.97, 1.03)) for key, val in female1.items()}
+        subject["measurementconversionfactor"] = female1["measurementconversionfactor"]
+        if i % 2:  # yeadon's default densities
+            del subject["totalmass"]
+        if i % 4 >= 2:  # stadia too thin for their perimeter, which yeadon makes circles
+            subject["La5w"] = subject["Lb6w"] = 3.0
+        meas_files.append(str(tmp_path / f"subject{i}.txt"))
+        with open(meas_files[-1], "w") as f:
+            yaml.safe_dump(subject, f)
+
+    native = biomake.SolidsArrays.from_measurements(*biomake.read_measurements(meas_files))
+    yeadon = biomake.SolidsArrays.from_humans([biomake._yeadon_human(meas) for meas in meas_files])
+
+    for name in ("mass", "com", "inertia", "proximal"):
+        np.testing.assert_allclose(getattr(native, name), getattr(yeadon, name), rtol=1e-12, atol=1e-12)
+
+
+@pytest.mark.parametrize("name, options", [("female1", None), ("female1_opt", "female1_opt.yml")])
+def test_read_biomod_round_trip(name, options):
+    with open(os.path.join(EXAMPLE, f"{name}.bioMod")) as f:
+        biomod = f.read()
+    options = biomake.parse_biomod_options(options and os.path.join(EXAMPLE, options))
+
+    model = biomake.read_biomod(os.path.join(EXAMPLE, f"{name}.bioMod"))
+    BioHuman, human_options, segments_options = options
+    rebuilt = BioHuman(biomake.BioModGeometry(model), **human_options, **segments_options)
+
+    # the example bioMods are printed by biomake.py, which ends them with an empty line
+    assert str(model) + "\n" == biomod
+    assert str(rebuilt) + "\n" == biomod
+
+
+def test_read_biomod_keeps_its_model_without_options():
+    BioHuman, human_options, segments_options = biomake.parse_biomod_options(None)
+    fused = biomake.BioModHumanFusedLegs(biomake.load_human(os.path.join(EXAMPLE, "female1.txt")))
+
+    rebuilt = BioHuman(biomake.load_human(os.path.join(EXAMPLE, "female1_opt.bioMod")), **human_options)
+
+    assert type(rebuilt) is biomake.BioModHumanFusedLegs
+    assert str(rebuilt) == str(fused)
+    with pytest.raises(ValueError):
+        biomake.BioModHuman(biomake.load_human(os.path.join(EXAMPLE, "female1_opt.bioMod")))
+
+
+@pytest.mark.parametrize("precision", [None, 0, 3, 6, 9, 15])
+def test_format_numbers_arrays_and_lists_agree(precision):
+    rng = np.random.default_rng(0)
+    numbers = np.concatenate(
+        [
+            rng.standard_normal(10000) * 10.0 ** rng.integers(-12, 20, 10000),
+            # ties at each number of decimals
+            (rng.integers(-(10**6), 10**6, 10000) + 0.5) / 10.0 ** rng.integers(0, 7, 10000),
+            [0.0, -0.0, -1e-17, np.inf, -np.inf, np.nan, 1e300, -1e300, 2.0**52 + 1, 2.0**52 - 0.5],
+        ]
+    )
+
+    texts = biomake.format_numbers(numbers, precision)
+
+    assert texts == biomake.format_numbers(list(numbers), precision)
+    if precision is None:
+        assert texts == [str(x) for x in numbers]
+    else:
+        assert "-0.0" not in texts
+
+
+def test_variants_reuse_written_segments():
+    options = os.path.join(EXAMPLE, "female1_opt.yml")
+    variants = biomake.build_variants(os.path.join(EXAMPLE, "female1.txt"), [options, options])
+
+    first = next(variants)
+    biomod = str(first)
+    second = next(variants)
+
+    assert second.texts.count(None) == 0
+    assert str(second) == biomod == str(biomake.build_biomod(os.path.join(EXAMPLE, "female1.txt"), options))
+
+
+def test_incremental_model_only_formats_rebuilt_segments():
+    human = biomake.load_human(os.path.join(EXAMPLE, "female1.txt"))
+    model = biomake.BioModHuman(human, incremental=True)
+    biomod = str(model)
+
+    edited = biomake.BioModHuman(human, incremental=True, previous=model, Head={"rotations": "xyz"})
+    numbers = edited.format_parameters()
+
+    assert [i for i, row in enumerate(numbers) if row is not None] == [edited.segment_names.index("Head")]
+    assert str(edited) == str(biomake.BioModHuman(human, Head={"rotations": "xyz"}))
+    same = biomake.BioModHuman(human, incremental=True, previous=edited, Head={"rotations": "xyz"})
+    assert same.format_parameters() == [None] * len(numbers)
+    assert str(biomake.BioModHuman(human, incremental=True, previous=same)) == biomod
+
+
+def test_file_cache_scans(tmp_path, monkeypatch):
+    scans = []
+    scandir = os.scandir
+    monkeypatch.setattr(os, "scandir", lambda path: scans.append(path) or scandir(path))
+    cache = biomake.FileCache(str(tmp_path), ".bioMod", 10000)
+
+    for i in range(200):
+        cache.put(biomake.FileCache.key(b"%d" % i), bytes(100))
+
+    files = [entry for entry in scandir(tmp_path) if entry.name.endswith(".bioMod")]
+    assert sum(entry.stat().st_size for entry in files) <= 10000
+    # the most recent files are kept
+    assert cache.get(biomake.FileCache.key(b"199")) is not None
+    assert len(scans) <= 10
+
+
+def test_server_only_serves_loopback():
+    with pytest.raises(ValueError):
+        biomake.BioModServer(("0.0.0.0", 0), jobs=1)
+
+    with biomake.BioModServer(("127.0.0.1", 0), jobs=1) as server:
+        assert server.server_address[0] == "127.0.0.1"
+
+
+@pytest.mark.parametrize("meas", ["female1.txt", "female1_opt.bioMod"])
+def test_server_builds_measurement_files_and_biomods(meas):
+    with biomake.BioModServer(("127.0.0.1", 0), jobs=1) as server:
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        try:
+            biomod = biomake.request_biomod(
+                os.path.join(EXAMPLE, meas), os.path.join(EXAMPLE, "female1_opt.yml"), server.server_address
+            )
+        finally:
+            server.shutdown()
+            thread.join()
+
+    with open(os.path.join(EXAMPLE, "female1_opt.bioMod")) as f:
+        assert biomod + "\n" == f.read()
+
+
+def test_server_replaces_dead_workers(tmp_path):
+    meas = os.path.join(EXAMPLE, "female1.txt")
+    (tmp_path / "bad.txt").write_text("Ls1L: -5\n")
+    with biomake.BioModServer(("127.0.0.1", 0), jobs=1) as server:
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        try:
+            with pytest.raises(ValueError):
+                biomake.request_biomod(str(tmp_path / "bad.txt"), address=server.server_address)
+            biomod = biomake.request_biomod(meas, address=server.server_address)
+            for process in list(server.executor._processes.values()):
+                process.kill()
+                process.join()
+            with pytest.raises(ConnectionError):
+                biomake.request_biomod(meas, address=server.server_address)
+
+            assert biomake.request_biomod(meas, address=server.server_address) == biomod
+        finally:
+            server.shutdown()
+            thread.join()